@@ -1,23 +1,63 @@
 # api_main.py
 
 import os
-import uuid
-import requests
-import pandas as pd
-from io import BytesIO
+import json
+import asyncio
+import threading
+import tempfile
+import contextlib
+import contextvars
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from urllib.parse import urlsplit, urljoin, parse_qs
 from datetime import datetime
-from bs4 import BeautifulSoup
+from typing import Optional
+from pydantic import BaseModel, Field
 from fastapi import FastAPI, Query, Path, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
-from requests.exceptions import RequestException, HTTPError
-import time
-import random
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse, PlainTextResponse, Response
+from starlette.background import BackgroundTask
+from fetcher import FetchEngine, ORIGIN
+from cache import get_default_cache
+from ratelimit import get_rate_limiter
+from jobs import get_job_manager, JobStatus
+from extractors import get_extractor
+from images import ImagePipeline
+from seen_index import get_seen_index, content_hash
+from search_index import get_search_index, LABEL_KINDS
+from results import get_result_store
+from exports import EXPORT_MEDIA_TYPES, write_excel, write_parquet, iter_csv
+from metrics import MetricsMiddleware, registry, phase
+from records import Article, Case, dumps, columns, record_id
+from dedup import get_dedup_store
+from thumbnails import get_thumbnail_cache, get_thumbnail_pool, make_thumbnail, cache_key
+import thumbnails
+import crawler
 
 # Enums for dropdown menus
 class FileFormat(str, Enum):
     json = "json"
     excel = "excel"
+    csv = "csv"
+    parquet = "parquet"
+    ndjson = "ndjson"
+    sse = "sse"
+
+STREAMING_FORMATS = (FileFormat.ndjson, FileFormat.sse)
+
+class JsonLayout(str, Enum):
+    records = "records"
+    columns = "columns"
+EXPORT_FORMATS = {FileFormat.excel: "xlsx", FileFormat.csv: "csv", FileFormat.parquet: "parquet"}
+
+class JobScope(str, Enum):
+    articles = "articles"
+    cases = "cases"
+
+class JobFilter(str, Enum):
+    recent = "recent"
+    section = "section"
+    system = "system"
 
 class ArticleSectionName(str, Enum):
     ANATOMY = "Anatomy"
@@ -83,198 +123,725 @@ app = FastAPI(
     description="An API to scrape case and article data from radiopaedia.org. Filter using interactive dropdowns. Results can be returned as JSON, downloaded as Excel, and images saved.",
     version="2.0.0"
 )
-
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.9',
-}
+app.add_middleware(MetricsMiddleware)
 
 BASE_IMAGE_DIR = "downloaded_images"
 os.makedirs(BASE_IMAGE_DIR, exist_ok=True)
 
+# HTML parsing, file writes and workbook building are CPU/disk bound, so they
+# run on a dedicated pool instead of the event loop that serves every client.
+BLOCKING_WORKERS = int(os.environ.get("SCRAPER_BLOCKING_WORKERS", "4"))
+blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="scraper-blocking")
+
+
+async def _run_blocking(func, *args):
+    # Run in a copy of the caller's context so phase timings reach its request.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, contextvars.copy_context().run, func, *args)
+
+
+# Streaming: how many search pages are scraped at once and how many parsed
+# records may wait for a slow client before scraping pauses.
+PAGES_IN_FLIGHT = int(os.environ.get("SCRAPER_PAGES_IN_FLIGHT", "3"))
+STREAM_QUEUE_SIZE = int(os.environ.get("SCRAPER_STREAM_QUEUE_SIZE", "64"))
+
+
+# Extractors are created per blocking-pool thread so compiled lxml queries are
+# never shared between threads. Resolving one here fails fast on a bad SCRAPER_PARSER.
+PARSER_BACKEND = get_extractor().name
+_extractor_local = threading.local()
+
+
+def _extractor():
+    if not hasattr(_extractor_local, "extractor"):
+        _extractor_local.extractor = get_extractor(PARSER_BACKEND)
+    return _extractor_local.extractor
+
+
+def _parse_article_links(content: bytes):
+    with phase("parse"):
+        return [ORIGIN + href for href in _extractor().article_links(content)]
+
+
+def _parse_article_detail(content: bytes, article_data: dict):
+    with phase("parse"):
+        article_data.update(_extractor().article_detail(content))
+
+
+def _parse_case_results(content: bytes):
+    """Returns one dict per case on a search page with its url and the search-result title/thumbnail."""
+    results = []
+    with phase("parse"):
+        for result in _extractor().case_results(content):
+            result['url'] = ORIGIN + result.pop('href')
+            results.append(result)
+    return results
+
+
+def _parse_search_entries(content: bytes, scope: str):
+    with phase("parse"):
+        return [
+            {'url': ORIGIN + entry['href'], 'fingerprint': entry['fingerprint']}
+            for entry in _extractor().search_entries(content, scope)
+        ]
+
+
+def _parse_dedup_entries(content: bytes, scope: str):
+    """Search entries for the dedup store; skips the parse when the store is disabled."""
+    return _parse_search_entries(content, scope) if get_dedup_store() is not None else []
+
+
+def _parse_case_detail(content: bytes, local_data: dict, study_images: bool = False):
+    with phase("parse"):
+        local_data.update(_extractor().case_detail(content, study_images))
+    if study_images:
+        # Kept as one space-separated string, like every other field, so exports and stored results hold it as is.
+        local_data['study_images'] = " ".join(urljoin(ORIGIN, src) for src in local_data['study_images'])
+
+
+async def _merge_pages(pages: int, concurrency: int, scrape_page, page_numbers: list = None):
+    """
+    Runs `scrape_page(engine, pg, emit)` for pages 1..`pages` (or just the
+    given `page_numbers`) on one shared FetchEngine and yields
+    `(page, position, record)` tuples as soon as they are emitted, followed
+    by `(page, None, None)` once a page is complete. Only
+    PAGES_IN_FLIGHT pages are worked on at a time and the hand-off queue is
+    bounded, so memory stays flat however many pages are requested.
+    """
+    queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    page_slots = asyncio.Semaphore(PAGES_IN_FLIGHT)
+
+    async with FetchEngine(max_concurrency=concurrency, run_blocking=_run_blocking) as engine:
+        async def run_page(pg: int):
+            async with page_slots:
+                try:
+                    await scrape_page(engine, pg, queue.put)
+                    await queue.put((pg, None, None))
+                except Exception as e:
+                    await queue.put(e)
+
+        page_numbers = page_numbers or range(1, pages + 1)
+        tasks = [asyncio.create_task(run_page(pg)) for pg in page_numbers]
+        try:
+            remaining = len(page_numbers)
+            while remaining:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                if item[1] is None:
+                    remaining -= 1
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _collect_pages(events, pages: int, progress=None):
+    """
+    Gathers streamed events back into the `{"page_n": [...]}` layout, in
+    search-result order. Pages that were never completed (an incremental crawl
+    that stopped early) are left out.
+    """
+    collected = {pg: {} for pg in range(1, pages + 1)}
+    completed = set()
+    async for pg, position, record in events:
+        if position is None:
+            completed.add(pg)
+            if progress:
+                await progress(pg, len(collected[pg]))
+        else:
+            collected[pg][position] = record
+    return {f"page_{pg}": [records[i] for i in sorted(records)] for pg, records in collected.items() if pg in completed}
+
+
+async def _indexed(events, scope: str, url_template: str):
+    """
+    Passes stream events through unchanged while adding each completed page's
+    records to the search index, tagged with the section/system the search URL
+    filtered on.
+    """
+    index = get_search_index()
+    query = parse_qs(urlsplit(url_template).query)
+    labels = {kind: query[kind][0] for kind in LABEL_KINDS if kind in query}
+    batch = []
+    try:
+        async for pg, position, record in events:
+            if position is not None:
+                batch.append(record)
+            elif batch and index is not None:
+                await _run_blocking(index.add, scope, batch, labels)
+                batch = []
+            yield pg, position, record
+    finally:
+        await events.aclose()
+
+
+async def _scrape_article(engine: FetchEngine, article_url: str, revalidate: bool = False):
+    """Scrapes one article; returns None if its page can't be fetched, so no partial record is kept or reused."""
+    article_data = {'article_id': record_id(article_url), 'url': article_url}
+    try:
+        with phase("detail_fetch"):
+            detail = await engine.get(article_url, revalidate=revalidate)
+        await _run_blocking(_parse_article_detail, detail.content, article_data)
+    except httpx.HTTPError:
+        return None
+    return Article.from_fields(article_data)
+
+
+async def _scrape_case(engine: FetchEngine, result: dict, pipeline: ImagePipeline = None, image_dir: str = None, revalidate: bool = False, study_images: bool = False):
+    """Scrapes one case from its search result; returns None if the case page can't be fetched or parsed."""
+    local_data = {}
+    local_data['patient_id'] = record_id(result['url'])
+    local_data['url'] = result['url']
+    try:
+        with phase("detail_fetch"):
+            res_case = await engine.get(result['url'], revalidate=revalidate)
+        await _run_blocking(_parse_case_detail, res_case.content, local_data, study_images)
+    except Exception:
+        return None
+    if 'title' in result:
+        local_data['title'] = result['title']
+    if 'image_url' in result:
+        local_data['image_url'] = result['image_url']
+    case = Case.from_fields(local_data)
+    _save_case_image(case, pipeline, image_dir)
+    return case
+
+
+def _save_case_image(case: Case, pipeline: ImagePipeline, image_dir: str):
+    """Queues the case's image under its patient ID; the image store links it without a download if it already holds it."""
+    if pipeline is not None and case.image_url:
+        extension = os.path.splitext(urlsplit(case.image_url).path)[1].lower() or ".jpg"
+        pipeline.submit(case.image_url, os.path.join(image_dir, f"{case.patient_id}{extension}"))
+
+
+async def _harvested(scope: str, entries: list) -> dict:
+    """
+    Looks up a search page's `{'url', 'fingerprint'}` entries in the dedup
+    store and returns `{url: (fingerprint, stored)}`, where `stored` is the
+    store's entry for the record or None if it was never harvested.
+    """
+    store = get_dedup_store()
+    if store is None or not entries:
+        return {}
+    known = await _run_blocking(store.lookup, [record_id(entry['url']) for entry in entries])
+    return {entry['url']: (entry['fingerprint'], known.get(record_id(entry['url']))) for entry in entries}
+
+
+async def _harvest(scope: str, url: str, harvested: dict, scrape, pipeline: ImagePipeline = None, image_dir: str = None, study_images: bool = False,
+                   reuse: bool = True):
+    """
+    Returns the record for `url`: the stored one when the dedup store holds it
+    under an unchanged search entry (and with its study images, if asked
+    for), otherwise `await scrape()`, which is then stored. `reuse=False`
+    always scrapes, for entries known to have changed behind an unchanged
+    search entry. Either way the record is marked "new" or "existing".
+    """
+    store = get_dedup_store()
+    fingerprint, stored = harvested.get(url, (None, None))
+    record_type = Case if scope == "cases" else Article
+    if reuse and stored is not None and store.reusable(stored, fingerprint) and (not study_images or 'study_images' in stored[1]):
+        registry.inc("scraper_dedup_total", result="reused")
+        fields = {name: value for name, value in stored[1].items() if study_images or name != 'study_images'}
+        record = record_type.from_fields({**fields, 'status': "existing"})
+        await _run_blocking(store.touch, [record_id(url)])
+        if scope == "cases":
+            _save_case_image(record, pipeline, image_dir)
+        return record
+    if (record := await scrape()) is None:
+        return None
+    record.status = "existing" if stored is not None else "new"
+    if store is not None:
+        registry.inc("scraper_dedup_total", result="scraped")
+        fields = {name: value for name, value in record.items() if name != 'status'}
+        await _run_blocking(store.put, scope, record_id(url), fields, fingerprint)
+    return record
+
+
+def _iter_articles_from_url(base_url_template: str, pages: int, concurrency: int = None, page_numbers: list = None):
+    async def scrape_article(engine: FetchEngine, pg: int, position: int, article_url: str, harvested: dict, emit):
+        if (record := await _harvest("articles", article_url, harvested, lambda: _scrape_article(engine, article_url))) is not None:
+            await emit((pg, position, record))
 
-def _scrape_articles_from_url(base_url_template: str, pages: int):
-    all_pages_articles = {}
-    session = requests.Session()
-    for pg in range(1, pages + 1):
-        articles_on_this_page = []
+    async def scrape_page(engine: FetchEngine, pg: int, emit):
         url = base_url_template.format(page=pg)
         try:
-            response = session.get(url, headers=HEADERS, timeout=25)
-            if response.status_code == 429:
-                time.sleep(10)
-                response = session.get(url, headers=HEADERS, timeout=25)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
-            for article_link in soup.find_all("a", {"class": "search-result search-result-article"}):
-                article_data = {}
-                article_url = "https://radiopaedia.org" + article_link.get("href")
-                article_data['url'] = article_url
-                try:
-                    req1 = session.get(article_url, headers=HEADERS, timeout=25)
-                    if req1.status_code == 429:
-                        time.sleep(10)
-                        req1 = session.get(article_url, headers=HEADERS, timeout=25)
-                    req1.raise_for_status()
-                    soup1 = BeautifulSoup(req1.content, "html.parser")
-                    if title_tag := soup1.find("h1", {"class": "header-title"}):
-                        article_data['title'] = title_tag.text.strip()
-                    if author_info := soup1.find("div", {"class": "author-info"}):
-                        article_data['date'] = author_info.text.split(" on ")[-1].strip()
-                    description_text = ""
-                    if body_content := soup1.find("div", {"class": "body user-generated-content"}):
-                        paragraphs = body_content.find_all('p')
-                        description_text = "\n".join([p.text.strip() for p in paragraphs])
-                    article_data['description'] = description_text
-                except (HTTPError, RequestException):
-                    pass
-                articles_on_this_page.append(article_data)
-                time.sleep(random.uniform(1, 2))
-            all_pages_articles[f'page_{pg}'] = articles_on_this_page
-            time.sleep(random.uniform(2, 4))
-        except (HTTPError, RequestException) as e:
+            with phase("search_fetch"):
+                response = await engine.get(url)
+        except httpx.HTTPError as e:
             raise Exception(f"Failed on page {pg}: {e}")
-    return all_pages_articles
+        article_urls = await _run_blocking(_parse_article_links, response.content)
+        harvested = await _harvested("articles", await _run_blocking(_parse_dedup_entries, response.content, "articles"))
+        await asyncio.gather(*(
+            scrape_article(engine, pg, position, article_url, harvested, emit) for position, article_url in enumerate(article_urls)
+        ))
+
+    return _indexed(_merge_pages(pages, concurrency, scrape_page, page_numbers), "articles", base_url_template)
 
 
-def _scrape_cases_from_url(url_template: str, pages: int, save_images: bool = False, image_dir: str = None):
-    final_data = {}
-    session = requests.Session()
+def _iter_cases_from_url(url_template: str, pages: int, save_images: bool = False, image_dir: str = None, concurrency: int = None, image_stats: dict = None, page_numbers: list = None, study_images: bool = False):
+    pipeline = None
 
-    for pg in range(1, pages + 1):
-        temp_data = []
+    async def scrape_case(engine: FetchEngine, pg: int, position: int, result: dict, harvested: dict, emit):
+        scrape = lambda: _scrape_case(engine, result, pipeline, image_dir, study_images=study_images)
+        if (local_data := await _harvest("cases", result['url'], harvested, scrape, pipeline, image_dir, study_images)) is not None:
+            await emit((pg, position, local_data))
+
+    async def scrape_page(engine: FetchEngine, pg: int, emit):
         url = url_template.format(page=pg)
         try:
-            res = session.get(url, headers=HEADERS, timeout=25)
-            if res.status_code == 429:
-                time.sleep(10)
-                res = session.get(url, headers=HEADERS, timeout=25)
-            res.raise_for_status()
-            soup = BeautifulSoup(res.content, "html.parser")
-            for i in soup.find_all("a", {"class": "search-result search-result-case"}):
-                local_data = {}
-                patient_id = str(uuid.uuid4())
-                local_data['patient_id'] = patient_id
-                try:
-                    case_url = "https://radiopaedia.org" + i.get("href")
-                    local_data['url'] = case_url
-
-                    res_case = session.get(case_url, headers=HEADERS, timeout=25)
-                    if res_case.status_code == 429:
-                        time.sleep(10)
-                        res_case = session.get(case_url, headers=HEADERS, timeout=25)
-                    res_case.raise_for_status()
-                    soup_case = BeautifulSoup(res_case.content, "html.parser")
-
-                    if pres := soup_case.find("div", {"id": "case-patient-presentation"}):
-                        if p_tag := pres.find("p"):
-                            local_data['presentation'] = p_tag.text.strip()
-
-                    p_data_list = [d.text.strip() for d in soup_case.select("div.case-section div.data-item")]
-                    local_data['patient_data'] = " ".join(p_data_list)
-
-                    if bs := soup_case.find("div", {"class": "body sub-section"}):
-                        case_parts = bs.text.strip().split("Case Discussion")
-                        local_data["case_discussion"] = case_parts[-1].strip()
-
-                    image_findings_list = [p.text.strip() for p in soup_case.select("div.study-findings p")]
-                    local_data['image_findings'] = " ".join(image_findings_list)
-
-                    if tt := i.find("h4", {"class": "search-result-title-text"}):
-                        local_data['title'] = tt.text.strip()
-
-                    if it := i.find("img", {"class": "media-object centered-image"}):
-                        image_url = it.get("src")
-                        local_data['image_url'] = image_url
-                        if save_images and image_dir and image_url:
-                            try:
-                                image_filename = f"{patient_id}.jpg"
-                                image_path = os.path.join(image_dir, image_filename)
-                                img_req = requests.get(image_url, timeout=25, headers=HEADERS)
-                                img_req.raise_for_status()
-                                with open(image_path, 'wb') as f:
-                                    f.write(img_req.content)
-                            except (RequestException, IOError):
-                                pass
-
-                    temp_data.append(local_data)
-                    time.sleep(random.uniform(1, 2))
-                except Exception:
+            with phase("search_fetch"):
+                res = await engine.get(url)
+            case_results = await _run_blocking(_parse_case_results, res.content)
+            harvested = await _harvested("cases", await _run_blocking(_parse_dedup_entries, res.content, "cases"))
+        except Exception as e:
+            raise Exception(f"Failed on page {pg}: {e}")
+        await asyncio.gather(*(
+            scrape_case(engine, pg, position, result, harvested, emit) for position, result in enumerate(case_results)
+        ))
+
+    if not (save_images and image_dir):
+        return _indexed(_merge_pages(pages, concurrency, scrape_page, page_numbers), "cases", url_template)
+
+    async def events_with_images():
+        # Images download in the background while records keep streaming; the
+        # stream only ends once every queued image has been saved.
+        nonlocal pipeline
+        async with ImagePipeline(_run_blocking, stats=image_stats) as pipeline:
+            async for event in _merge_pages(pages, concurrency, scrape_page, page_numbers):
+                yield event
+
+    return _indexed(events_with_images(), "cases", url_template)
+
+
+async def _iter_incremental(scope: str, url_template: str, pages: int, delta: dict, concurrency: int = None, save_images: bool = False, image_dir: str = None, image_stats: dict = None, study_images: bool = False):
+    """
+    Incremental crawl of a feed sorted by last edit. Pages are walked in order
+    and detail pages are only fetched for entries that may have changed since
+    the last crawl: new entries, entries whose search-result entry changed, and
+    entries that rose in the feed. Since the feed is sorted by edit date,
+    unedited entries keep the relative order the last crawl saw, so an entry
+    listed above one it used to be below has been edited, even if its
+    search-result entry reads the same. An edit to the entry already at the top
+    leaves the order alone, so the top of the feed is re-checked against the
+    stored content hash until an entry turns out unchanged.
+
+    The crawl stops after the first page on which nothing may have changed.
+    Only new and updated records are yielded, and the new/updated/unchanged
+    counts are written into `delta`.
+    """
+    index = get_seen_index()
+    delta.update(new=0, updated=0, unchanged=0, pages_crawled=0, stopped_early=False)
+    use_images = save_images and image_dir and scope == "cases"
+    pipeline_context = ImagePipeline(_run_blocking, stats=image_stats) if use_images else contextlib.nullcontext()
+    ranks = await _run_blocking(index.ranks, url_template)
+    listed = []
+
+    async with FetchEngine(max_concurrency=concurrency, run_blocking=_run_blocking) as engine, pipeline_context as pipeline:
+        async def check(candidates: list, known: dict, harvested: dict) -> list:
+            """Scrapes `(position, entry, result, reuse)` candidates and indexes them; returns `(position, record, status)`."""
+            if scope == "cases":
+                records = await asyncio.gather(*(
+                    _harvest(scope, result['url'], harvested, lambda result=result: _scrape_case(engine, result, pipeline, image_dir, revalidate=True, study_images=study_images), pipeline, image_dir, study_images, reuse=reuse)
+                    for _, _, result, reuse in candidates
+                ))
+            else:
+                records = await asyncio.gather(*(
+                    _harvest(scope, result['url'], harvested, lambda result=result: _scrape_article(engine, result['url'], revalidate=True), reuse=reuse)
+                    for _, _, result, reuse in candidates
+                ))
+            indexed, checked = [], []
+            for (position, entry, _, _), record in zip(candidates, records):
+                if record is None:
+                    # The detail page failed; leaving the entry unindexed retries it on the next poll.
                     continue
+                digest = content_hash(record)
+                previous = known.get(entry['url'])
+                status = "new" if previous is None else "updated" if previous[1] != digest else "unchanged"
+                delta[status] += 1
+                indexed.append((entry['url'], entry['fingerprint'], digest, record.get('date')))
+                checked.append((position, record, status))
+            if indexed:
+                await _run_blocking(index.record, scope, indexed)
+            return checked
+
+        for pg in range(1, pages + 1):
+            url = url_template.format(page=pg)
+            try:
+                with phase("search_fetch"):
+                    response = await engine.get(url, revalidate=True)
+                entries = await _run_blocking(_parse_search_entries, response.content, scope)
+                if scope == "cases":
+                    results = await _run_blocking(_parse_case_results, response.content)
+                else:
+                    results = [{'url': entry['url']} for entry in entries]
+            except Exception as e:
+                raise Exception(f"Failed on page {pg}: {e}")
+
+            known = await _run_blocking(index.lookup, [entry['url'] for entry in entries])
+            changed, unchanged = [], []
+            for position, (entry, result) in enumerate(zip(entries, results)):
+                url = entry['url']
+                if url not in known or known[url][0] != entry['fingerprint']:
+                    changed.append((position, entry, result, True))
+                elif _rose(url, position, entries, listed, ranks):
+                    changed.append((position, entry, result, False))
+                else:
+                    unchanged.append((position, entry, result, False))
+                listed.append(url)
+            await _run_blocking(index.touch, [entry['url'] for entry in entries if entry['url'] in known])
+
+            harvested = await _harvested(scope, entries)
+            checked = await check(changed, known, harvested)
+            if pg == 1 and ranks:
+                # Re-check the top of the feed one entry at a time, for as long as the entries turn out updated.
+                while unchanged:
+                    checked += (top := await check([unchanged.pop(0)], known, harvested))
+                    if not top or top[0][2] != "updated":
+                        break
+            delta['unchanged'] += len(unchanged)
+
+            for position, record, status in checked:
+                if status != "unchanged":
+                    yield pg, position, record
+
+            delta['pages_crawled'] = pg
+            yield pg, None, None
+            if entries and not changed and all(status == "unchanged" for _, _, status in checked):
+                delta['stopped_early'] = pg < pages
+                break
+
+    await _run_blocking(index.set_ranks, url_template, listed)
+
+
+def _rose(url: str, position: int, entries: list, listed: list, ranks: dict) -> bool:
+    """
+    Whether the entry at `position` on the current page moved up the feed since
+    the last crawl, which listed its entries in `ranks` order. An entry the last
+    crawl listed rose if fewer of that crawl's entries are listed above it now
+    than were then; one it didn't list rose if it is listed above one it did.
+    """
+    if url in ranks:
+        return sum(1 for seen in listed if seen in ranks) < ranks[url]
+    return any(entry['url'] in ranks for entry in entries[position + 1:])
+
+
+async def _scrape_articles_from_url(base_url_template: str, pages: int, concurrency: int = None, progress=None):
+    return await _collect_pages(_iter_articles_from_url(base_url_template, pages, concurrency), pages, progress)
+
+
+async def _scrape_cases_from_url(url_template: str, pages: int, save_images: bool = False, image_dir: str = None, concurrency: int = None, progress=None, image_stats: dict = None, study_images: bool = False):
+    return await _collect_pages(_iter_cases_from_url(url_template, pages, save_images, image_dir, concurrency, image_stats, study_images=study_images), pages, progress)
 
-            final_data[f"page_{pg}"] = temp_data
-            time.sleep(random.uniform(2, 4))
 
+def _articles_url_template(section: str = None, system: str = None) -> str:
+    if section:
+        return f"{ORIGIN}/search?scope=articles&section={section}&page={{page}}"
+    if system:
+        return f"{ORIGIN}/search?scope=articles&system={system}&page={{page}}"
+    return f"{ORIGIN}/search?page={{page}}&scope=articles&sort=date_of_last_edit"
+
+
+def _cases_url_template(system: str = None) -> str:
+    if system:
+        return f"{ORIGIN}/search?scope=cases&system={system}&page={{page}}"
+    return f"{ORIGIN}/search?scope=cases&sort=date_of_publication&page={{page}}"
+
+
+async def scrape_recent_articles(pages: int, concurrency: int = None, progress=None):
+    return await _scrape_articles_from_url(_articles_url_template(), pages, concurrency=concurrency, progress=progress)
+
+
+async def scrape_articles_by_section(pages: int, section: str, concurrency: int = None, progress=None):
+    return await _scrape_articles_from_url(_articles_url_template(section=section), pages, concurrency=concurrency, progress=progress)
+
+
+async def scrape_articles_by_system(pages: int, system: str, concurrency: int = None, progress=None):
+    return await _scrape_articles_from_url(_articles_url_template(system=system), pages, concurrency=concurrency, progress=progress)
+
+
+async def scrape_recent_cases(pages: int, save_images: bool, image_dir: str, concurrency: int = None, progress=None, image_stats: dict = None, study_images: bool = False):
+    return await _scrape_cases_from_url(_cases_url_template(), pages, save_images, image_dir, concurrency=concurrency, progress=progress, image_stats=image_stats, study_images=study_images)
+
+
+async def scrape_cases_by_system(pages: int, system: str, save_images: bool, image_dir: str, concurrency: int = None, progress=None, image_stats: dict = None, study_images: bool = False):
+    return await _scrape_cases_from_url(_cases_url_template(system=system), pages, save_images, image_dir, concurrency=concurrency, progress=progress, image_stats=image_stats, study_images=study_images)
+
+
+async def scrape_batch(scope: str, filter_kind: str, names: list, pages: int, save_images: bool = False, image_dir: str = None, concurrency: int = None, image_stats: dict = None, stats: dict = None, study_images: bool = False):
+    """
+    Scrapes `pages` search pages for each section/system in `names` on one
+    shared FetchEngine and returns `{name: {"page_n": [...]}}`. A detail page
+    listed under several filters is fetched and parsed once, and every filter
+    gets the same record. Counts of detail URLs seen vs. fetched are written
+    into `stats`.
+    """
+    stats = stats if stats is not None else {}
+    slots = [(name, pg) for name in names for pg in range(1, pages + 1)]
+    details = {}
+    references = {}
+
+    def detail(url: str, scrape):
+        # One task per URL, shared by every page that lists it; shielded so a
+        # cancelled page doesn't cancel a fetch other pages are waiting on.
+        references[url] = references.get(url, 0) + 1
+        if url not in details:
+            details[url] = asyncio.ensure_future(scrape())
+        return asyncio.shield(details[url])
+
+    def template(name: str) -> str:
+        if scope == "cases":
+            return _cases_url_template(system=name)
+        return _articles_url_template(**{filter_kind: name})
+
+    pipeline = None
+
+    async def scrape_page(engine: FetchEngine, slot: int, emit):
+        name, pg = slots[slot - 1]
+        try:
+            with phase("search_fetch"):
+                response = await engine.get(template(name).format(page=pg))
+            if scope == "cases":
+                results = await _run_blocking(_parse_case_results, response.content)
+            else:
+                results = [{'url': url} for url in await _run_blocking(_parse_article_links, response.content)]
+            harvested = await _harvested(scope, await _run_blocking(_parse_dedup_entries, response.content, scope))
         except Exception as e:
-            raise Exception(f"Failed on page {pg}: {e}")
+            raise Exception(f"Failed on {name} page {pg}: {e}")
+
+        async def scrape_entry(position: int, result: dict):
+            if scope == "cases":
+                scrape = lambda: _scrape_case(engine, result, pipeline, image_dir, study_images=study_images)
+            else:
+                scrape = lambda: _scrape_article(engine, result['url'])
+            record = await detail(result['url'], lambda: _harvest(scope, result['url'], harvested, scrape, pipeline, image_dir, study_images))
+            if record is not None:
+                await emit((slot, position, record))
+
+        await asyncio.gather(*(scrape_entry(position, result) for position, result in enumerate(results)))
+
+    data = {name: {} for name in names}
+    pipeline_context = ImagePipeline(_run_blocking, stats=image_stats) if save_images and image_dir and scope == "cases" else contextlib.nullcontext()
+    try:
+        async with pipeline_context as pipeline:
+            collected = await _collect_pages(_merge_pages(len(slots), concurrency, scrape_page), len(slots))
+    finally:
+        for task in details.values():
+            task.cancel()
+    for slot, (name, pg) in enumerate(slots, start=1):
+        data[name][f"page_{pg}"] = collected.get(f"page_{slot}", [])
 
-    return final_data
+    if (index := get_search_index()) is not None:
+        for name, name_pages in data.items():
+            await _run_blocking(index.add, scope, [r for records in name_pages.values() for r in records], {filter_kind: name})
+    stats.update(
+        filters=len(names),
+        search_pages=len(slots),
+        detail_urls=sum(references.values()),
+        detail_fetches=len(details),
+        shared_detail_urls=sum(1 for count in references.values() if count > 1),
+    )
+    return data
 
 
-def scrape_recent_articles(pages: int):
-    url_template = "https://radiopaedia.org/search?page={page}&scope=articles&sort=date_of_last_edit"
-    return _scrape_articles_from_url(url_template, pages)
+def _make_image_dir(prefix: str):
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    image_dir = os.path.join(BASE_IMAGE_DIR, f"{prefix}_{timestamp}")
+    os.makedirs(image_dir, exist_ok=True)
+    return image_dir, {"saved": True, "directory": os.path.abspath(image_dir), "stats": {}}
 
 
-def scrape_articles_by_section(pages: int, section: str):
-    url_template = f"https://radiopaedia.org/search?scope=articles&section={section}&page={{page}}"
-    return _scrape_articles_from_url(url_template, pages)
+def _spool_export(write, data: dict, extension: str) -> str:
+    """Runs `write(data, path)` into a temporary file and returns its path."""
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=f".{extension}")
+    os.close(fd)
+    try:
+        with phase("export"):
+            write(data, path)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+async def _stored_events(data: dict):
+    """Replays an already scraped `{"page_n": [...]}` result as stream events."""
+    for page_key, records in data.items():
+        pg = int(page_key.replace('page_', ''))
+        for position, record in enumerate(records):
+            yield pg, position, record
+        yield pg, None, None
+
 
+def _stream_response(events, file_format: FileFormat, image_save_info: dict = {"saved": False, "directory": None}, summary: dict = None):
+    """
+    Streams records to the client as they are scraped: one `{"page", "record"}`
+    object per line for NDJSON, or `record`/`page`/`end` events for SSE, where
+    the `end` event also carries `summary` as filled in by the scrape. A failure
+    mid-stream is reported as a final `{"error": ...}` line or `error` event.
+    """
+    sse = file_format == FileFormat.sse
 
-def scrape_articles_by_system(pages: int, system: str):
-    url_template = f"https://radiopaedia.org/search?scope=articles&system={system}&page={{page}}"
-    return _scrape_articles_from_url(url_template, pages)
+    def frame(event: str, payload: dict) -> str:
+        line = dumps(payload).decode("utf-8")
+        return f"event: {event}\ndata: {line}\n\n" if sse else line + "\n"
 
+    async def body():
+        count = 0
+        try:
+            async for pg, position, record in events:
+                if position is None:
+                    if sse:
+                        yield frame("page", {"page": pg})
+                    continue
+                count += 1
+                yield frame("record", {"page": pg, "record": record})
+        except Exception as e:
+            yield frame("error", {"error": f"An error occurred: {e}"})
+            return
+        if sse:
+            yield frame("end", {"records": count, **(summary or {})})
 
-def scrape_recent_cases(pages: int, save_images: bool, image_dir: str):
-    url_template = "https://radiopaedia.org/search?scope=cases&sort=date_of_publication&page={page}"
-    return _scrape_cases_from_url(url_template, pages, save_images, image_dir)
+    headers = {"Cache-Control": "no-cache"}
+    if image_save_info["saved"]:
+        headers["X-Image-Save-Path"] = image_save_info["directory"]
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
 
 
-def scrape_cases_by_system(pages: int, system: str, save_images: bool, image_dir: str):
-    url_template = f"https://radiopaedia.org/search?scope=cases&system={system}&page={{page}}"
-    return _scrape_cases_from_url(url_template, pages, save_images, image_dir)
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (when installed), which also encodes Case/Article records directly."""
 
+    def render(self, content) -> bytes:
+        return dumps(content)
 
-async def _prepare_response(data: dict, file_format: FileFormat, filename_base: str, image_save_info: dict = {"saved": False, "directory": None}):
-    if file_format == FileFormat.excel:
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            for page_key, page_data in data.items():
-                if page_data:
-                    df = pd.DataFrame(page_data)
-                    sheet_name = f"Page {page_key.replace('page_', '')}"
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-        output.seek(0)
+
+async def _prepare_response(data: dict, file_format: FileFormat, filename_base: str, image_save_info: dict = {"saved": False, "directory": None}, delta: dict = None, layout: JsonLayout = JsonLayout.records):
+    if file_format in STREAMING_FORMATS:
+        return _stream_response(_stored_events(data), file_format, image_save_info)
+    if file_format in EXPORT_FORMATS:
+        extension = EXPORT_FORMATS[file_format]
         safe_filename_base = "".join(c if c.isalnum() else "_" for c in filename_base)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_filename_base}_{timestamp}.xlsx"
+        filename = f"{safe_filename_base}_{timestamp}.{extension}"
         headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
         if image_save_info["saved"]:
             headers["X-Image-Save-Path"] = image_save_info["directory"]
-        return StreamingResponse(
-            output,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers=headers
-        )
+        if delta is not None:
+            headers["X-Sync-Delta"] = json.dumps(delta)
+        media_type = EXPORT_MEDIA_TYPES[extension]
+        if file_format == FileFormat.csv:
+            return StreamingResponse(iter_csv(data), media_type=media_type, headers=headers)
+        # Workbooks and Parquet files are written to disk in constant memory and
+        # then streamed from there; the file is removed once it has been sent.
+        write = write_excel if file_format == FileFormat.excel else write_parquet
+        path = await _run_blocking(_spool_export, write, data, extension)
+        return FileResponse(path, media_type=media_type, headers=headers, background=BackgroundTask(os.remove, path))
     else:
+        if layout == JsonLayout.columns:
+            data = await _run_blocking(columns, data)
         response_content = {"data": data}
         if image_save_info["saved"]:
             response_content["image_save_info"] = image_save_info
-        return JSONResponse(content=response_content)
+        if delta is not None:
+            response_content["delta"] = delta
+        return FastJSONResponse(content=response_content)
+
+
+@app.get("/health", tags=["Service"])
+async def health_endpoint():
+    return {"status": "ok"}
+
+
+@app.get("/cache/stats", tags=["Service"])
+async def cache_stats_endpoint():
+    cache = get_default_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **await _run_blocking(cache.stats)}
+
+
+@app.get("/metrics", tags=["Service"], response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Request, throttle, retry, cache and per-phase latency metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/dedup/stats", tags=["Service"])
+async def dedup_stats_endpoint():
+    store = get_dedup_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **await _run_blocking(store.stats)}
+
+
+@app.get("/thumbnails/stats", tags=["Service"])
+async def thumbnail_stats_endpoint():
+    cache = get_thumbnail_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **await _run_blocking(cache.stats)}
+
+
+@app.get("/ratelimit/stats", tags=["Service"])
+async def ratelimit_stats_endpoint():
+    return get_rate_limiter().stats()
+
+
+@app.get("/search/stats", tags=["Service"])
+async def search_stats_endpoint():
+    index = get_search_index()
+    if index is None:
+        return {"enabled": False}
+    return {"enabled": True, **await _run_blocking(index.stats)}
+
+
+@app.get("/search", tags=["Search"])
+async def search_endpoint(
+    q: str = Query(..., min_length=1, description="Words to search for in titles, descriptions, presentations, findings and discussions; end a word with * to match prefixes."),
+    scope: Optional[JobScope] = Query(None, description="Only articles or only cases."),
+    section: Optional[str] = Query(None, description="Only records scraped from this article section (case-sensitive)."),
+    system: Optional[str] = Query(None, description="Only records scraped from this medical system (case-sensitive)."),
+    page: int = Query(1, ge=1, description="Page of results."),
+    page_size: int = Query(20, ge=1, le=100, description="Results per page (Max 100).")
+):
+    """Ranked full-text search over every article and case scraped so far, answered from the local index."""
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="The search index is disabled (SCRAPER_SEARCH_INDEX_PATH is empty).")
+    try:
+        found = await _run_blocking(index.search, q, scope.value if scope else None, section, system, page, page_size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+    return {"query": q, "page": page, "page_size": page_size, **found}
 
 
 @app.get("/articles/recent", tags=["Radiopaedia Articles"])
 async def get_recent_articles_endpoint(
     pages: int = Query(1, ge=1, le=5, description="Number of pages to scrape (Max 5)."),
-    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON or Excel.")
+    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON, Excel, CSV, Parquet, or streamed NDJSON/SSE."),
+    layout: JsonLayout = Query(JsonLayout.records, description="JSON layout: a list of records per page, or one flat list per column."),
+    concurrency: int = Query(None, ge=1, le=32, description="Max detail pages fetched in parallel (defaults to server setting)."),
+    incremental: bool = Query(False, description="Only return articles that are new or changed since the last incremental call.")
 ):
+    if incremental:
+        delta = {}
+        events = _indexed(_iter_incremental("articles", _articles_url_template(), pages, delta, concurrency), "articles", _articles_url_template())
+        if file_format in STREAMING_FORMATS:
+            return _stream_response(events, file_format, summary=delta)
+        try:
+            data = await _collect_pages(events, pages)
+            return await _prepare_response(data, file_format, "recent_articles_delta", {"saved": False}, delta=delta, layout=layout)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+    if file_format in STREAMING_FORMATS:
+        return _stream_response(_iter_articles_from_url(_articles_url_template(), pages, concurrency), file_format)
     try:
-        data = scrape_recent_articles(pages=pages)
+        data = await scrape_recent_articles(pages=pages, concurrency=concurrency)
         if not data or all(not v for v in data.values()):
             raise HTTPException(status_code=404, detail="No articles found.")
-        return await _prepare_response(data, file_format, "recent_articles", {"saved": False})
+        return await _prepare_response(data, file_format, "recent_articles", {"saved": False}, layout=layout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
@@ -283,14 +850,18 @@ async def get_recent_articles_endpoint(
 async def get_articles_by_section_endpoint(
     section_name: str = Path(..., example="Anatomy", description="Article section (case-sensitive)."),
     pages: int = Query(1, ge=1, le=5, description="Pages to scrape (Max 5)."),
-    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON or Excel.")
+    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON, Excel, CSV, Parquet, or streamed NDJSON/SSE."),
+    layout: JsonLayout = Query(JsonLayout.records, description="JSON layout: a list of records per page, or one flat list per column."),
+    concurrency: int = Query(None, ge=1, le=32, description="Max detail pages fetched in parallel (defaults to server setting).")
 ):
+    if file_format in STREAMING_FORMATS:
+        return _stream_response(_iter_articles_from_url(_articles_url_template(section=section_name), pages, concurrency), file_format)
     try:
-        data = scrape_articles_by_section(pages=pages, section=section_name)
+        data = await scrape_articles_by_section(pages=pages, section=section_name, concurrency=concurrency)
         if not data or all(not v for v in data.values()):
             raise HTTPException(status_code=404, detail=f"No articles found for section '{section_name}'.")
         filename_base = f"articles_section_{section_name.replace(' ', '_')}"
-        return await _prepare_response(data, file_format, filename_base, {"saved": False})
+        return await _prepare_response(data, file_format, filename_base, {"saved": False}, layout=layout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
@@ -299,14 +870,18 @@ async def get_articles_by_section_endpoint(
 async def get_articles_by_system_endpoint(
     system_name: str = Path(..., example="Central Nervous System", description="Medical system (case-sensitive)."),
     pages: int = Query(1, ge=1, le=5, description="Pages to scrape (Max 5)."),
-    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON or Excel.")
+    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON, Excel, CSV, Parquet, or streamed NDJSON/SSE."),
+    layout: JsonLayout = Query(JsonLayout.records, description="JSON layout: a list of records per page, or one flat list per column."),
+    concurrency: int = Query(None, ge=1, le=32, description="Max detail pages fetched in parallel (defaults to server setting).")
 ):
+    if file_format in STREAMING_FORMATS:
+        return _stream_response(_iter_articles_from_url(_articles_url_template(system=system_name), pages, concurrency), file_format)
     try:
-        data = scrape_articles_by_system(pages=pages, system=system_name)
+        data = await scrape_articles_by_system(pages=pages, system=system_name, concurrency=concurrency)
         if not data or all(not v for v in data.values()):
             raise HTTPException(status_code=404, detail=f"No articles found for system '{system_name}'.")
         filename_base = f"articles_system_{system_name.replace(' ', '_')}"
-        return await _prepare_response(data, file_format, filename_base, {"saved": False})
+        return await _prepare_response(data, file_format, filename_base, {"saved": False}, layout=layout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
@@ -314,22 +889,32 @@ async def get_articles_by_system_endpoint(
 @app.get("/cases/recent", tags=["Radiopaedia Cases"])
 async def get_recent_cases_endpoint(
     pages: int = Query(1, ge=1, le=5, description="Pages to scrape (Max 5)."),
-    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON or Excel."),
-    save_images: bool = Query(False, description="Save case images to server?")
+    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON, Excel, CSV, Parquet, or streamed NDJSON/SSE."),
+    layout: JsonLayout = Query(JsonLayout.records, description="JSON layout: a list of records per page, or one flat list per column."),
+    save_images: bool = Query(False, description="Save case images to server?"),
+    study_images: bool = Query(False, description="Record the URLs of every study image on each case page (space-separated, not downloaded)."),
+    concurrency: int = Query(None, ge=1, le=32, description="Max detail pages fetched in parallel (defaults to server setting)."),
+    incremental: bool = Query(False, description="Only return cases that are new or changed since the last incremental call.")
 ):
     try:
-        image_dir, image_save_info = None, {"saved": False, "directory": None}
-        if save_images:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            unique_dir_name = f"recent_cases_{timestamp}"
-            image_dir = os.path.join(BASE_IMAGE_DIR, unique_dir_name)
-            os.makedirs(image_dir, exist_ok=True)
-            image_save_info = {"saved": True, "directory": os.path.abspath(image_dir)}
+        image_dir, image_save_info = _make_image_dir("recent_cases") if save_images else (None, {"saved": False, "directory": None})
+        if incremental:
+            delta = {}
+            events = _indexed(
+                _iter_incremental("cases", _cases_url_template(), pages, delta, concurrency, save_images, image_dir, image_save_info.get("stats"), study_images),
+                "cases", _cases_url_template(),
+            )
+            if file_format in STREAMING_FORMATS:
+                return _stream_response(events, file_format, image_save_info, summary=delta)
+            data = await _collect_pages(events, pages)
+            return await _prepare_response(data, file_format, "recent_cases_delta", image_save_info, delta=delta, layout=layout)
+        if file_format in STREAMING_FORMATS:
+            return _stream_response(_iter_cases_from_url(_cases_url_template(), pages, save_images, image_dir, concurrency, image_save_info.get("stats"), study_images=study_images), file_format, image_save_info)
 
-        data = scrape_recent_cases(pages=pages, save_images=save_images, image_dir=image_dir)
+        data = await scrape_recent_cases(pages=pages, save_images=save_images, image_dir=image_dir, concurrency=concurrency, image_stats=image_save_info.get("stats"), study_images=study_images)
         if not data or all(not v for v in data.values()):
             raise HTTPException(status_code=404, detail="No cases found.")
-        return await _prepare_response(data, file_format, "recent_cases", image_save_info)
+        return await _prepare_response(data, file_format, "recent_cases", image_save_info, layout=layout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
 
@@ -338,23 +923,333 @@ async def get_recent_cases_endpoint(
 async def get_cases_by_system_endpoint(
     system_name: str = Path(..., example="Chest", description="Medical system (case-sensitive)."),
     pages: int = Query(1, ge=1, le=5, description="Pages to scrape (Max 5)."),
-    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON or Excel."),
-    save_images: bool = Query(False, description="Save case images to server?")
+    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON, Excel, CSV, Parquet, or streamed NDJSON/SSE."),
+    layout: JsonLayout = Query(JsonLayout.records, description="JSON layout: a list of records per page, or one flat list per column."),
+    save_images: bool = Query(False, description="Save case images to server?"),
+    study_images: bool = Query(False, description="Record the URLs of every study image on each case page (space-separated, not downloaded)."),
+    concurrency: int = Query(None, ge=1, le=32, description="Max detail pages fetched in parallel (defaults to server setting).")
 ):
     try:
-        image_dir, image_save_info = None, {"saved": False, "directory": None}
         if save_images:
             safe_system_name = "".join(c if c.isalnum() else "_" for c in system_name)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            unique_dir_name = f"cases_{safe_system_name}_{timestamp}"
-            image_dir = os.path.join(BASE_IMAGE_DIR, unique_dir_name)
-            os.makedirs(image_dir, exist_ok=True)
-            image_save_info = {"saved": True, "directory": os.path.abspath(image_dir)}
+            image_dir, image_save_info = _make_image_dir(f"cases_{safe_system_name}")
+        else:
+            image_dir, image_save_info = None, {"saved": False, "directory": None}
+        if file_format in STREAMING_FORMATS:
+            return _stream_response(_iter_cases_from_url(_cases_url_template(system=system_name), pages, save_images, image_dir, concurrency, image_save_info.get("stats"), study_images=study_images), file_format, image_save_info)
 
-        data = scrape_cases_by_system(pages=pages, system=system_name, save_images=save_images, image_dir=image_dir)
+        data = await scrape_cases_by_system(pages=pages, system=system_name, save_images=save_images, image_dir=image_dir, concurrency=concurrency, image_stats=image_save_info.get("stats"), study_images=study_images)
         if not data or all(not v for v in data.values()):
             raise HTTPException(status_code=404, detail=f"No cases found for system '{system_name}'.")
         filename_base = f"cases_system_{system_name.replace(' ', '_')}"
-        return await _prepare_response(data, file_format, filename_base, image_save_info)
+        return await _prepare_response(data, file_format, filename_base, image_save_info, layout=layout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+
+# --- Lazily fetched study images ---
+
+async def _study_image_urls(case_id: str) -> list:
+    """
+    Study image URLs of a harvested case. Scrapes that didn't record them
+    leave the case page to be fetched now, on first access; the URLs are then
+    kept with the case in the dedup store.
+    """
+    store = get_dedup_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="The dedup store is disabled (SCRAPER_DEDUP_PATH is empty), so case IDs can't be resolved.")
+    stored = (await _run_blocking(store.lookup, [case_id])).get(case_id)
+    if stored is None or 'patient_id' not in stored[1]:
+        raise HTTPException(status_code=404, detail=f"Unknown case '{case_id}'.")
+    fingerprint, record, _ = stored
+    if 'study_images' not in record:
+        try:
+            async with FetchEngine(run_blocking=_run_blocking) as engine:
+                with phase("detail_fetch"):
+                    response = await engine.get(record['url'])
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=502, detail=f"An error occurred: {e}")
+        fields = {}
+        await _run_blocking(_parse_case_detail, response.content, fields, True)
+        record = {**record, 'study_images': fields['study_images']}
+        await _run_blocking(store.put, "cases", case_id, record, fingerprint)
+    return record['study_images'].split()
+
+
+async def _cached_image(url: str, size: int):
+    """
+    Returns `(data, media_type)` of the image at `url`, scaled to fit in
+    `size` pixels (0 for the original). The original is fetched and the
+    thumbnail generated in the thumbnail process pool on first access; both
+    stay in the thumbnail cache until evicted. The bytes are read while the
+    cache still holds the file, so an eviction by another request is just a
+    cache miss.
+    """
+    cache = get_thumbnail_cache()
+    if (cached := await _run_blocking(cache.read, cache_key(url, size))) is not None:
+        return cached
+    if (original := await _run_blocking(cache.read, cache_key(url, 0))) is None:
+        async with FetchEngine(cache=False) as engine:
+            with phase("image_download"):
+                response = await engine.get(url)
+        original = response.content, response.headers.get("content-type", "image/jpeg")
+        await _run_blocking(cache.put, cache_key(url, 0), *original)
+    if size == 0:
+        return original
+    with phase("thumbnail"):
+        thumbnail = await asyncio.get_running_loop().run_in_executor(get_thumbnail_pool(), make_thumbnail, original[0], size)
+    await _run_blocking(cache.put, cache_key(url, size), thumbnail, "image/jpeg")
+    return thumbnail, "image/jpeg"
+
+
+@app.get("/cases/{case_id}/images", tags=["Radiopaedia Cases"])
+async def get_case_images_endpoint(
+    case_id: str = Path(..., description="`patient_id` of a scraped case."),
+    size: int = Query(thumbnails.THUMBNAIL_SIZE, ge=16, le=thumbnails.THUMBNAIL_MAX_SIZE, description="Thumbnail size (longest side, in pixels) to link to.")
+):
+    """Lists a case's study images with links to their thumbnails and originals; nothing is downloaded until those are requested."""
+    urls = await _study_image_urls(case_id)
+    return {
+        "patient_id": case_id,
+        "images": [
+            {
+                "index": index,
+                "source_url": url,
+                "thumbnail_url": f"/cases/{case_id}/images/{index}?size={size}",
+                "original_url": f"/cases/{case_id}/images/{index}?size=0",
+            }
+            for index, url in enumerate(urls)
+        ],
+    }
+
+
+@app.get("/cases/{case_id}/images/{index}", tags=["Radiopaedia Cases"], response_class=Response)
+async def get_case_image_endpoint(
+    case_id: str = Path(..., description="`patient_id` of a scraped case."),
+    index: int = Path(..., ge=0, description="Position of the image in GET /cases/{case_id}/images."),
+    size: int = Query(thumbnails.THUMBNAIL_SIZE, ge=0, le=thumbnails.THUMBNAIL_MAX_SIZE, description="Longest side of the thumbnail in pixels; 0 for the original image.")
+):
+    urls = await _study_image_urls(case_id)
+    if index >= len(urls):
+        raise HTTPException(status_code=404, detail=f"Case '{case_id}' has {len(urls)} study image(s).")
+    if get_thumbnail_cache() is None:
+        raise HTTPException(status_code=503, detail="The thumbnail cache is disabled (SCRAPER_THUMBNAIL_DIR is empty).")
+    if size and thumbnails.Image is None:
+        raise HTTPException(status_code=503, detail="Thumbnails need Pillow installed on the server; request size=0 for the original.")
+    try:
+        data, media_type = await _cached_image(urls[index], size)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"An error occurred: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+    return Response(data, media_type=media_type, headers={"Cache-Control": "public, max-age=86400"})
+
+
+# --- Background scrape jobs ---
+
+MAX_JOB_PAGES = int(os.environ.get("SCRAPER_MAX_JOB_PAGES", "50"))
+
+
+class JobRequest(BaseModel):
+    scope: JobScope = Field(..., description="Scrape articles or cases.")
+    filter: JobFilter = Field(JobFilter.recent, description="Recent items, or filter by section (articles only) or system.")
+    name: Optional[str] = Field(None, description="Section or system name when filtering (case-sensitive).", examples=["Chest"])
+    pages: int = Field(1, ge=1, le=MAX_JOB_PAGES, description=f"Pages to scrape (Max {MAX_JOB_PAGES}).")
+    save_images: bool = Field(False, description="Save case images to server? (cases only)")
+    study_images: bool = Field(False, description="Record the URLs of every study image on each case page (cases only, not downloaded).")
+    concurrency: Optional[int] = Field(None, ge=1, le=32, description="Max detail pages fetched in parallel (defaults to server setting).")
+
+
+def _job_plan(request: JobRequest):
+    """Returns the dedup key, filename base and scrape coroutine factory for a job request."""
+    if request.filter != JobFilter.recent and not request.name:
+        raise HTTPException(status_code=422, detail=f"A name is required when filtering by {request.filter.value}.")
+    if request.scope == JobScope.cases and request.filter == JobFilter.section:
+        raise HTTPException(status_code=422, detail="Cases can only be filtered by system.")
+
+    name = request.name if request.filter != JobFilter.recent else None
+    save_images = request.save_images and request.scope == JobScope.cases
+    study_images = request.study_images and request.scope == JobScope.cases
+    key = (request.scope.value, request.filter.value, name, request.pages, save_images, study_images)
+    if request.filter == JobFilter.recent:
+        filename_base = f"recent_{request.scope.value}"
+    else:
+        filename_base = f"{request.scope.value}_{request.filter.value}_{name.replace(' ', '_')}"
+
+    def make_run(image_dir: str, image_stats: dict):
+        async def run(progress):
+            options = {"pages": request.pages, "concurrency": request.concurrency, "progress": progress}
+            if request.scope == JobScope.articles:
+                if request.filter == JobFilter.section:
+                    return await scrape_articles_by_section(section=name, **options)
+                if request.filter == JobFilter.system:
+                    return await scrape_articles_by_system(system=name, **options)
+                return await scrape_recent_articles(**options)
+            if request.filter == JobFilter.system:
+                return await scrape_cases_by_system(system=name, save_images=save_images, image_dir=image_dir, image_stats=image_stats, study_images=study_images, **options)
+            return await scrape_recent_cases(save_images=save_images, image_dir=image_dir, image_stats=image_stats, study_images=study_images, **options)
+        return run
+
+    return key, filename_base, save_images, make_run
+
+
+@app.post("/jobs", status_code=202, tags=["Scrape Jobs"])
+async def create_job_endpoint(request: JobRequest):
+    key, filename_base, save_images, make_run = _job_plan(request)
+    job_manager = get_job_manager()
+    if job := await job_manager.find_in_flight(key):
+        await job_manager.subscribe(job)
+        return job.summary()
+    image_dir, image_save_info = _make_image_dir(filename_base) if save_images else (None, {"saved": False, "directory": None})
+    job = await job_manager.submit(key, make_run(image_dir, image_save_info.get("stats")), request.pages, filename_base, image_save_info)
+    return job.summary()
+
+
+@app.get("/jobs/{job_id}", tags=["Scrape Jobs"])
+async def get_job_endpoint(job_id: str = Path(..., description="ID returned by POST /jobs.")):
+    job = await get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+    return job.summary()
+
+
+@app.get("/jobs/{job_id}/result", tags=["Scrape Jobs"])
+async def get_job_result_endpoint(
+    job_id: str = Path(..., description="ID returned by POST /jobs."),
+    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON, Excel, CSV, Parquet, or streamed NDJSON/SSE."),
+    layout: JsonLayout = Query(JsonLayout.records, description="JSON layout: a list of records per page, or one flat list per column.")
+):
+    job = await get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+    if job.in_flight:
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is still {job.status.value}.")
+    if job.status == JobStatus.failed:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {job.error}")
+    data = job.result if job.result_id is None else (await _load_result(job.result_id))[0]
+    if not data or all(not v for v in data.values()):
+        raise HTTPException(status_code=404, detail="The job finished without finding any records.")
+    return await _prepare_response(data, file_format, job.filename_base, job.image_save_info, layout=layout)
+
+
+# --- Stored results ---
+
+async def _load_result(result_id: str):
+    store = get_result_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="The result store is disabled (SCRAPER_RESULT_DIR is empty).")
+    if (stored := await _run_blocking(store.get, result_id)) is None:
+        raise HTTPException(status_code=404, detail=f"Result '{result_id}' is unknown or has expired.")
+    return stored
+
+
+@app.get("/results/stats", tags=["Service"])
+async def result_stats_endpoint():
+    store = get_result_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **await _run_blocking(store.stats)}
+
+
+@app.get("/results/{result_id}", tags=["Scrape Jobs"])
+async def get_result_endpoint(
+    result_id: str = Path(..., description="`result_id` of a finished job."),
+    file_format: FileFormat = Query(FileFormat.json, description="Output format: JSON, Excel, CSV, Parquet, or streamed NDJSON/SSE."),
+    layout: JsonLayout = Query(JsonLayout.records, description="JSON layout: a list of records per page, or one flat list per column.")
+):
+    """Renders a stored scrape result in any format without scraping again."""
+    data, meta = await _load_result(result_id)
+    return await _prepare_response(data, file_format, meta.get("filename_base", "result"), meta.get("image_save_info") or {"saved": False}, layout=layout)
+
+
+# --- Batched multi-filter scrapes ---
+
+MAX_BATCH_FILTERS = int(os.environ.get("SCRAPER_MAX_BATCH_FILTERS", "40"))
+
+
+class BatchRequest(BaseModel):
+    scope: JobScope = Field(..., description="Scrape articles or cases.")
+    filter: JobFilter = Field(..., description="Filter by section (articles only) or system.")
+    names: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_FILTERS, description="Sections or systems to scrape (case-sensitive).", examples=[["Chest", "Cardiac", "Vascular"]])
+    pages: int = Field(1, ge=1, le=5, description="Pages to scrape per section/system (Max 5).")
+    save_images: bool = Field(False, description="Save case images to server? (cases only)")
+    study_images: bool = Field(False, description="Record the URLs of every study image on each case page (cases only, not downloaded).")
+    concurrency: Optional[int] = Field(None, ge=1, le=32, description="Max detail pages fetched in parallel (defaults to server setting).")
+
+
+@app.post("/batch", tags=["Batch"])
+async def batch_endpoint(request: BatchRequest):
+    """
+    Scrapes several sections or systems in one call through one pooled set of
+    connections. Items listed under more than one of them are fetched once;
+    the result is keyed by section/system name.
+    """
+    if request.filter == JobFilter.recent:
+        raise HTTPException(status_code=422, detail="Batches filter by section or system.")
+    if request.scope == JobScope.cases and request.filter == JobFilter.section:
+        raise HTTPException(status_code=422, detail="Cases can only be filtered by system.")
+    names = list(dict.fromkeys(request.names))
+    save_images = request.save_images and request.scope == JobScope.cases
+    try:
+        image_dir, image_save_info = _make_image_dir(f"batch_{request.scope.value}") if save_images else (None, {"saved": False, "directory": None})
+        stats = {}
+        data = await scrape_batch(
+            request.scope.value, request.filter.value, names, request.pages, save_images, image_dir,
+            concurrency=request.concurrency, image_stats=image_save_info.get("stats"), stats=stats,
+            study_images=request.study_images and request.scope == JobScope.cases,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+    response_content = {"data": data, "stats": stats}
+    if image_save_info["saved"]:
+        response_content["image_save_info"] = image_save_info
+    return FastJSONResponse(content=response_content)
+
+
+# --- Sharded multi-process crawls ---
+
+MAX_CRAWL_PAGES = int(os.environ.get("SCRAPER_MAX_CRAWL_PAGES", "2000"))
+
+
+class CrawlRequest(BaseModel):
+    targets: list[str] = Field(..., min_length=1, description="What to crawl: <articles|cases>:<recent|section|system>[:<name>|*], where * means every section/system.", examples=[["cases:system:Chest", "articles:section:*"]])
+    pages: int = Field(..., ge=1, le=MAX_CRAWL_PAGES, description=f"Search pages to crawl per target (Max {MAX_CRAWL_PAGES}).")
+    shard_pages: int = Field(crawler.SHARD_PAGES, ge=1, description="Pages per shard, the unit of work handed to a process.")
+    workers: int = Field(crawler.CRAWL_WORKERS, ge=1, le=32, description="Worker processes.")
+    rate: Optional[float] = Field(None, gt=0, description="Total requests/sec across all workers (defaults to server setting).")
+    concurrency: Optional[int] = Field(None, ge=1, le=32, description="Parallel detail fetches per worker (defaults to server setting).")
+
+
+@app.post("/crawls", status_code=202, tags=["Crawls"])
+async def create_crawl_endpoint(request: CrawlRequest):
+    try:
+        manifest = crawler.create_run(request.targets, request.pages, request.shard_pages)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    crawler.start_in_background(manifest["run_id"], request.workers, request.rate or crawler.GLOBAL_RATE, request.concurrency)
+    return await _run_blocking(crawler.crawl_status, manifest["run_id"])
+
+
+@app.get("/crawls/{run_id}", tags=["Crawls"])
+async def get_crawl_endpoint(run_id: str = Path(..., description="ID returned by POST /crawls.")):
+    try:
+        return await _run_blocking(crawler.crawl_status, run_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown crawl '{run_id}'.")
+
+
+@app.post("/crawls/{run_id}/resume", status_code=202, tags=["Crawls"])
+async def resume_crawl_endpoint(
+    run_id: str = Path(..., description="ID returned by POST /crawls."),
+    workers: int = Query(crawler.CRAWL_WORKERS, ge=1, le=32, description="Worker processes."),
+    rate: Optional[float] = Query(None, gt=0, description="Total requests/sec across all workers (defaults to server setting)."),
+    concurrency: Optional[int] = Query(None, ge=1, le=32, description="Parallel detail fetches per worker (defaults to server setting).")
+):
+    """Crawls the pages of an interrupted or failed run that aren't checkpointed yet."""
+    try:
+        status = await _run_blocking(crawler.crawl_status, run_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown crawl '{run_id}'.")
+    if status["status"] == "running" or not crawler.start_in_background(run_id, workers, rate or crawler.GLOBAL_RATE, concurrency):
+        raise HTTPException(status_code=409, detail=f"Crawl '{run_id}' is already running.")
+    return await _run_blocking(crawler.crawl_status, run_id)
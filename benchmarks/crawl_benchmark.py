@@ -0,0 +1,60 @@
+# benchmarks/crawl_benchmark.py
+
+"""
+Scaling benchmark for the sharded crawler: the same crawl plan is run against a
+local fake Radiopaedia with an increasing number of worker processes, first
+with a request-rate ceiling high enough not to matter and then with a
+politeness ceiling, reporting aggregate pages/min for each.
+
+    python benchmarks/crawl_benchmark.py --pages 24 --workers 1 2 4 --ceiling 60
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+
+ORIGIN_PORT = 8768
+os.environ.setdefault("RADIOPAEDIA_ORIGIN", f"http://127.0.0.1:{ORIGIN_PORT}")
+os.environ.setdefault("SCRAPER_HOST_RATE", "0")
+os.environ["SCRAPER_CACHE_PATH"] = ""
+os.environ["SCRAPER_DEDUP_PATH"] = ""
+os.environ["SCRAPER_SEARCH_INDEX_PATH"] = ""
+if "SCRAPER_CRAWL_DIR" not in os.environ:  # spawned workers re-run this module and must keep the parent's directory
+    os.environ["SCRAPER_CRAWL_DIR"] = tempfile.mkdtemp(prefix="crawl_benchmark_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawler
+from fake_origin import start_in_subprocess
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="cases:system:Chest")
+    parser.add_argument("--pages", type=int, default=24)
+    parser.add_argument("--shard-pages", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--ceiling", type=float, default=60, help="Politeness ceiling in requests/sec for the second pass.")
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    origin_process = start_in_subprocess(ORIGIN_PORT, latency=args.latency, jitter=0.02)
+    try:
+        for label, rate in (("unbounded", 10000.0), (f"{args.ceiling:g} req/s", args.ceiling)):
+            baseline = None
+            for workers in args.workers:
+                run_id = crawler.create_run([args.target], args.pages, args.shard_pages)["run_id"]
+                report = crawler.run_crawl(run_id, workers=workers, rate=rate)
+                baseline = baseline or report["pages_per_min"] / workers
+                print(
+                    f"{label:>12}  {workers:2d} workers: {report['pages']:4d} pages  {report['records']:5d} records  "
+                    f"{report['seconds']:6.1f} s  {report['pages_per_min']:7.1f} pages/min  "
+                    f"({report['pages_per_min'] / baseline:4.2f}x of 1 worker)"
+                    + (f"  errors: {report['errors']}" if report["errors"] else "")
+                )
+    finally:
+        origin_process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/export_benchmark.py
+
+"""
+Export benchmark: builds a synthetic scrape result of case-like records with
+long free-text fields and writes it in each export format, every format in its
+own process so peak RSS reflects that writer alone. Reports export time,
+output size and how far peak RSS grew above the in-memory result itself.
+
+  pandas-excel  the previous Excel path (a DataFrame per page into BytesIO)
+  excel         openpyxl write-only workbook spooled to disk
+  csv           incremental CSV text
+  parquet       zstd-compressed Parquet, one row group per page
+
+    python benchmarks/export_benchmark.py --records 10000 --page-size 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exports import write_excel, write_parquet, iter_csv
+
+FORMATS = ("pandas-excel", "excel", "csv", "parquet")
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore".split()
+
+
+def synthetic_result(records: int, page_size: int) -> dict:
+    def text(n: int, words: int) -> str:
+        return " ".join(WORDS[(n + i) % len(WORDS)] for i in range(words))
+
+    data = {}
+    for n in range(records):
+        data.setdefault(f"page_{n // page_size + 1}", []).append({
+            'patient_id': f"{n:032x}",
+            'url': f"https://radiopaedia.org/cases/case-{n}",
+            'presentation': text(n, 30),
+            'patient_data': "Age: 40 years Gender: Female",
+            'case_discussion': text(n, 400),
+            'image_findings': text(n, 150),
+            'title': f"Case {n}",
+            'image_url': f"https://prod-images-static.radiopaedia.org/images/{n}/thumb.jpg",
+        })
+    return data
+
+
+def pandas_excel(data: dict, path: str):
+    import pandas as pd
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for page_key, page_data in data.items():
+            pd.DataFrame(page_data).to_excel(writer, sheet_name=f"Page {page_key.replace('page_', '')}", index=False)
+    with open(path, "wb") as f:
+        f.write(output.getvalue())
+
+
+def write_csv(data: dict, path: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in iter_csv(data):
+            f.write(chunk)
+
+
+WRITERS = {"pandas-excel": pandas_excel, "excel": write_excel, "csv": write_csv, "parquet": write_parquet}
+
+
+def run_format(name: str, records: int, page_size: int):
+    """Runs inside a child process so ru_maxrss reflects this writer alone."""
+    data = synthetic_result(records, page_size)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    fd, path = tempfile.mkstemp(suffix=f".{name}")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        WRITERS[name](data, path)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+    finally:
+        os.remove(path)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"format": name, "seconds": elapsed, "size_mb": size / 1e6, "baseline_rss_mb": baseline, "extra_rss_mb": peak - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=20, help="Records per page (one sheet / row group each).")
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--format", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.format:
+        run_format(args.format, args.records, args.page_size)
+        return
+
+    print(f"{args.records} records, {args.page_size} per page")
+    for name in args.formats:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--format", name,
+             "--records", str(args.records), "--page-size", str(args.page_size)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:>13}: {result['seconds']:7.2f} s  {result['size_mb']:7.2f} MB out  "
+            f"RSS {result['baseline_rss_mb']:6.1f} MB + {result['extra_rss_mb']:6.1f} MB while exporting"
+        )
+
+
+if __name__ == "__main__":
+    main()
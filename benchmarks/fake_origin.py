@@ -0,0 +1,239 @@
+# benchmarks/fake_origin.py
+
+"""
+A local stand-in for radiopaedia.org that serves synthetic search, article,
+case, image and study image pages with a configurable response latency, optionally
+answering 429 with Retry-After once requests exceed a given rate or for a
+random share of requests. Given a recording made by record_fixtures.py it
+replays the recorded pages and images instead, falling back to synthetic
+pages for anything that wasn't recorded. Point the scraper at it with
+RADIOPAEDIA_ORIGIN=http://127.0.0.1:<port>.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import struct
+import socket
+import random
+import asyncio
+import hashlib
+import argparse
+import functools
+import threading
+import subprocess
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response
+
+RESULTS_PER_PAGE = 20
+STUDY_IMAGES_PER_CASE = 6
+STUDY_IMAGE_SIZE = (1024, 768)
+FILLER = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40 + "</p>"
+
+
+def search_page(scope: str, page: int, origin: str) -> str:
+    links = []
+    for n in range(RESULTS_PER_PAGE):
+        slug = f"{scope[:-1]}-{page}-{n}"
+        if scope == "cases":
+            links.append(
+                f'<a class="search-result search-result-case" href="/cases/{slug}">'
+                f'<img class="media-object centered-image" src="{origin}/images/{slug}.jpg">'
+                f'<h4 class="search-result-title-text">Case {page}.{n}</h4></a>'
+            )
+        else:
+            links.append(f'<a class="search-result search-result-article" href="/articles/{slug}">Article {page}.{n}</a>')
+    return f"<html><body><div class='search-results'>{''.join(links)}</div>{FILLER * 5}</body></html>"
+
+
+def article_page(slug: str) -> str:
+    return (
+        f'<html><body><h1 class="header-title">Article {slug}</h1>'
+        f'<div class="author-info">Last revised by Fake Author on 1 Jan 2024</div>'
+        f'<div class="body user-generated-content"><p>Description of {slug}.</p>{FILLER * 10}</div>'
+        f'{FILLER * 30}</body></html>'
+    )
+
+
+def case_page(slug: str) -> str:
+    return (
+        f'<html><body><h1 class="header-title">Case {slug}</h1>'
+        f'<div id="case-patient-presentation"><p>Presentation of {slug}.</p></div>'
+        f'<div class="case-section"><div class="data-item">Age: 40 years</div><div class="data-item">Gender: Female</div></div>'
+        f'<div class="case-section study">'
+        + "".join(f'<img class="study-image" data-src="/studies/{slug}-{n}.png" src="/assets/blank.gif">' for n in range(STUDY_IMAGES_PER_CASE))
+        + f'</div><div class="study-findings"><p>Findings for {slug}.</p>{FILLER * 5}</div>'
+        f'<div class="body sub-section">Case Discussion Discussion of {slug}.</div>'
+        f'{FILLER * 30}</body></html>'
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def study_image(name: str) -> bytes:
+    """A full-size PNG (a gradient seeded by `name`), so thumbnailing has real pixels to decode."""
+    width, height = STUDY_IMAGE_SIZE
+    shade = int(hashlib.sha1(name.encode()).hexdigest()[:2], 16)
+    rows = b"".join(b"\x00" + bytes((x + shade) % 256 for x in range(width)) for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)  # 8-bit greyscale
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b"")
+
+
+# Absolute links to radiopaedia.org and its CDNs inside recorded pages.
+RECORDED_LINK = re.compile(rb"https?://((?:[\w-]+\.)*radiopaedia\.org)")
+EXTERNAL_PREFIX = "/_external/"
+
+
+def load_recording(directory: str) -> dict:
+    """
+    Reads a recording made by record_fixtures.py into
+    `{request path and query: (content type, body)}`.
+    """
+    with open(os.path.join(directory, "index.json")) as f:
+        index = json.load(f)
+    recording = {}
+    for key, entry in index["entries"].items():
+        with open(os.path.join(directory, entry["file"]), "rb") as f:
+            recording[key] = (entry["content_type"], f.read())
+    return recording
+
+
+def _localise(body: bytes, origin: str) -> bytes:
+    """Points recorded absolute links at this server: the site itself at its root, CDN hosts under /_external/<host>."""
+    def replace(match):
+        host = match.group(1).decode()
+        return origin.encode() + (b"" if host in ("radiopaedia.org", "www.radiopaedia.org") else f"{EXTERNAL_PREFIX}{host}".encode())
+    return RECORDED_LINK.sub(replace, body)
+
+
+def create_app(latency: float = 0.2, jitter: float = 0.05, capacity: float = 0, throttle_ratio: float = 0, recording: dict = None) -> FastAPI:
+    """
+    `capacity` > 0 throttles: requests beyond that many per second get a 429.
+    `throttle_ratio` > 0 answers that share of requests with a 429 at random.
+    `recording` (from load_recording) is replayed in preference to synthetic pages.
+    """
+    fake = FastAPI()
+    fake.state.throttled = 0
+    fake.state.replayed = 0
+    allowance = {"tokens": capacity, "at": time.monotonic()}
+    recording = recording or {}
+
+    @fake.middleware("http")
+    async def replay(request: Request, call_next):
+        query = request.scope["query_string"].decode()
+        key = request.scope.get("raw_path", request.url.path.encode()).decode() + (f"?{query}" if query else "")
+        if key not in recording:
+            return await call_next(request)
+        await delay()
+        fake.state.replayed += 1
+        content_type, body = recording[key]
+        if content_type.startswith("text/html"):
+            return html(request, _localise(body, f"{request.url.scheme}://{request.url.netloc}").decode("utf-8", "replace"))
+        return Response(content=body, media_type=content_type)
+
+    # Registered after replay so it runs first and throttles replayed pages too.
+    @fake.middleware("http")
+    async def throttle(request: Request, call_next):
+        if request.url.path != "/stats":
+            if throttle_ratio > 0 and random.random() < throttle_ratio:
+                fake.state.throttled += 1
+                return Response(status_code=429, headers={"Retry-After": "1"})
+            if capacity > 0:
+                now = time.monotonic()
+                allowance["tokens"] = min(capacity, allowance["tokens"] + (now - allowance["at"]) * capacity)
+                allowance["at"] = now
+                if allowance["tokens"] < 1:
+                    fake.state.throttled += 1
+                    return Response(status_code=429, headers={"Retry-After": "1"})
+                allowance["tokens"] -= 1
+        return await call_next(request)
+
+    @fake.get("/stats")
+    async def stats():
+        return {"throttled": fake.state.throttled, "replayed": fake.state.replayed}
+
+    async def delay():
+        await asyncio.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+
+    def html(request: Request, body: str) -> Response:
+        etag = '"' + hashlib.md5(body.encode()).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return HTMLResponse(body, headers={"ETag": etag})
+
+    @fake.get("/search")
+    async def search(request: Request, scope: str = "articles", page: int = 1):
+        await delay()
+        origin = f"{request.url.scheme}://{request.url.netloc}"
+        return html(request, search_page(scope, page, origin))
+
+    @fake.get("/articles/{slug}")
+    async def article(request: Request, slug: str):
+        await delay()
+        return html(request, article_page(slug))
+
+    @fake.get("/cases/{slug}")
+    async def case(request: Request, slug: str):
+        await delay()
+        return html(request, case_page(slug))
+
+    @fake.get("/images/{name}")
+    async def image(name: str):
+        await delay()
+        return Response(content=name.encode() * 2048, media_type="image/jpeg")
+
+    @fake.get("/studies/{name}")
+    async def study(name: str):
+        await delay()
+        return Response(content=study_image(name), media_type="image/png")
+
+    return fake
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    """Runs `app` on 127.0.0.1:`port` in a daemon thread and waits until it accepts requests."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def start_in_subprocess(port: int, latency: float = 0.2, jitter: float = 0.05, capacity: float = 0,
+                        throttle_ratio: float = 0, recording: str = None) -> subprocess.Popen:
+    """Starts the fake origin in its own process so it doesn't compete with the code under test for the GIL."""
+    process = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__),
+        "--port", str(port), "--latency", str(latency), "--jitter", str(jitter),
+        "--capacity", str(capacity), "--throttle-ratio", str(throttle_ratio),
+    ] + (["--recording", recording] if recording else []))
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Fake origin did not start on port {port}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake radiopaedia.org locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--capacity", type=float, default=0, help="Requests/sec served before answering 429 (0 = never).")
+    parser.add_argument("--throttle-ratio", type=float, default=0, help="Share of requests answered with 429 at random.")
+    parser.add_argument("--recording", help="Directory written by record_fixtures.py to replay.")
+    args = parser.parse_args()
+    recording = load_recording(args.recording) if args.recording else None
+    uvicorn.run(create_app(args.latency, args.jitter, args.capacity, args.throttle_ratio, recording),
+                host="127.0.0.1", port=args.port, log_level="warning")
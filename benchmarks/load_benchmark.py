@@ -0,0 +1,98 @@
+# benchmarks/load_benchmark.py
+
+"""
+Measures how responsive the API stays while scrapes are running: N scrape
+requests are kept in flight against a local fake Radiopaedia while a trivial
+endpoint (/health) is probed, and its p50/p99 latency is reported.
+
+    python benchmarks/load_benchmark.py --scrapes 8 --pages 2
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+ORIGIN_PORT = 8765
+API_PORT = 8766
+os.environ.setdefault("RADIOPAEDIA_ORIGIN", f"http://127.0.0.1:{ORIGIN_PORT}")
+os.environ.setdefault("SCRAPER_HOST_RATE", "0")
+os.environ.setdefault("SCRAPER_GLOBAL_RATE", "0")
+# Every scrape must hit the origin, not the response cache or dedup store of an earlier one.
+os.environ["SCRAPER_CACHE_PATH"] = ""
+os.environ["SCRAPER_DEDUP_PATH"] = ""
+os.environ["SCRAPER_SEARCH_INDEX_PATH"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Anything the API still writes (downloaded images, job and result stores) goes to a scratch directory.
+os.chdir(tempfile.mkdtemp(prefix="load_benchmark_"))
+
+import httpx
+from fake_origin import start_in_subprocess, serve_in_thread
+from api_main import app
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run(scrapes: int, pages: int, interval: float, idle_seconds: float):
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{API_PORT}", timeout=600) as client:
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, interval))
+        await asyncio.sleep(idle_seconds)
+        stop.set()
+        idle = await probe_task
+
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, interval))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.get("/cases/recent", params={"pages": pages}) for _ in range(scrapes)
+        ))
+        scrape_seconds = time.perf_counter() - start
+        stop.set()
+        loaded = await probe_task
+
+    failed = sum(1 for r in responses if r.status_code != 200)
+    print(f"scrapes in flight: {scrapes} x {pages} page(s), finished in {scrape_seconds:.2f}s ({failed} failed)")
+    for label, samples in (("idle", idle), ("under load", loaded)):
+        print(
+            f"/health {label:>10}: n={len(samples):4d}  p50={statistics.median(samples):7.2f} ms  "
+            f"p99={percentile(samples, 99):7.2f} ms  max={max(samples):7.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scrapes", type=int, default=8, help="Concurrent scrape requests to keep in flight.")
+    parser.add_argument("--pages", type=int, default=1, help="Search pages per scrape request.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake origin response latency in seconds.")
+    parser.add_argument("--interval", type=float, default=0.02, help="Pause between /health probes in seconds.")
+    parser.add_argument("--idle-seconds", type=float, default=2.0, help="How long to probe before starting scrapes.")
+    args = parser.parse_args()
+
+    origin = start_in_subprocess(ORIGIN_PORT, latency=args.latency)
+    try:
+        serve_in_thread(app, API_PORT)
+        asyncio.run(run(args.scrapes, args.pages, args.interval, args.idle_seconds))
+    finally:
+        origin.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/parse_benchmark.py
+
+"""
+Parsing microbenchmark for the extractor backends. Every fixture page is first
+parsed with each backend and the records compared against html.parser,
+including search-entry fingerprints and case study-image lists; then
+each backend parses the whole fixture set repeatedly in its own process and
+reports pages/sec and peak RSS.
+
+Fixture files are named after the page kind they hold (search-articles*,
+search-cases*, article*, case*). By default the saved pages in
+benchmarks/fixtures are used together with full-size synthetic pages from the
+fake origin; pass --fixtures to point at another directory of saved pages.
+
+    python benchmarks/parse_benchmark.py --rounds 20
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import BACKENDS, get_extractor
+import fake_origin
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Fixture file prefix -> extractor method.
+KINDS = {
+    "search-articles": "article_links",
+    "search-cases": "case_results",
+    "article": "article_detail",
+    "case": "case_detail",
+}
+
+# Fixture file prefix -> every `(method, args)` compared across backends.
+# Search-entry fingerprints drive incremental crawls and record reuse, so a
+# parser difference there would silently change which records are scraped.
+PARITY_CHECKS = {
+    "search-articles": [("article_links", ()), ("search_entries", ("articles",))],
+    "search-cases": [("case_results", ()), ("search_entries", ("cases",))],
+    "article": [("article_detail", ())],
+    "case": [("case_detail", ()), ("case_detail", (True,))],
+}
+
+
+def load_fixtures(fixtures_dir: str, synthetic: int) -> list:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.html"))):
+        kind = next(k for k in KINDS if os.path.basename(path).startswith(k))
+        with open(path, "rb") as f:
+            pages.append((kind, os.path.basename(path), f.read()))
+    origin = "https://radiopaedia.org"
+    for n in range(synthetic):
+        pages.append(("search-articles", f"synthetic-search-articles-{n}", fake_origin.search_page("articles", n, origin).encode()))
+        pages.append(("search-cases", f"synthetic-search-cases-{n}", fake_origin.search_page("cases", n, origin).encode()))
+        pages.append(("article", f"synthetic-article-{n}", fake_origin.article_page(f"article-{n}").encode()))
+        pages.append(("case", f"synthetic-case-{n}", fake_origin.case_page(f"case-{n}").encode()))
+    return pages
+
+
+def check_parity(pages: list) -> bool:
+    reference = get_extractor("html.parser")
+    identical = True
+    for name in BACKENDS:
+        extractor = get_extractor(name)
+        for kind, label, content in pages:
+            for method, args in PARITY_CHECKS[kind]:
+                expected = getattr(reference, method)(content, *args)
+                actual = getattr(extractor, method)(content, *args)
+                if json.dumps(expected) != json.dumps(actual):
+                    identical = False
+                    call = ", ".join(["content", *map(repr, args)])
+                    print(f"MISMATCH [{name}] {label} {method}({call}):\n  html.parser: {expected}\n  {name}: {actual}")
+    return identical
+
+
+def run_backend(name: str, fixtures_dir: str, synthetic: int, rounds: int):
+    """Runs inside a child process so ru_maxrss reflects this backend alone."""
+    pages = load_fixtures(fixtures_dir, synthetic)
+    extractor = get_extractor(name)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for kind, _, content in pages:
+            getattr(extractor, KINDS[kind])(content)
+    elapsed = time.perf_counter() - start
+    parsed = rounds * len(pages)
+    megabytes = rounds * sum(len(content) for _, _, content in pages) / 1e6
+    print(json.dumps({
+        "backend": name,
+        "pages": parsed,
+        "seconds": elapsed,
+        "pages_per_sec": parsed / elapsed,
+        "mb_per_sec": megabytes / elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of saved fixture pages.")
+    parser.add_argument("--synthetic", type=int, default=5, help="Synthetic pages of each kind to add to the fixtures.")
+    parser.add_argument("--rounds", type=int, default=10, help="Times each backend parses the whole fixture set.")
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        run_backend(args.backend, args.fixtures, args.synthetic, args.rounds)
+        return
+
+    pages = load_fixtures(args.fixtures, args.synthetic)
+    print(f"{len(pages)} fixture pages, {sum(len(c) for _, _, c in pages) / 1e6:.2f} MB")
+    identical = check_parity(pages)
+    print("records identical across backends" if identical else "RECORDS DIFFER between backends")
+
+    for name in BACKENDS:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--backend", name, "--fixtures", args.fixtures,
+             "--synthetic", str(args.synthetic), "--rounds", str(args.rounds)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:>12}: {result['pages_per_sec']:8.1f} pages/s  {result['mb_per_sec']:6.2f} MB/s  "
+            f"peak RSS {result['peak_rss_mb']:6.1f} MB"
+        )
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
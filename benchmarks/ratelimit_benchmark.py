@@ -0,0 +1,101 @@
+# benchmarks/ratelimit_benchmark.py
+
+"""
+Compares request pacing strategies against a local fake Radiopaedia that only
+serves `--capacity` requests/sec and answers 429 (Retry-After: 1) beyond that.
+For each strategy and starting rate it fetches `--requests` distinct pages and
+reports throughput alongside how many 429s the origin had to send.
+
+  fixed     the old behaviour: a static rate, one retry after a 10 s sleep
+  adaptive  the shared token bucket with AIMD control and jittered, budgeted retries
+
+    python benchmarks/ratelimit_benchmark.py --capacity 10 --requests 200
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+ORIGIN_PORT = 8767
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fake_origin import start_in_subprocess
+from fetcher import FetchEngine
+from ratelimit import RateLimiter, RetryPolicy, RetryBudget
+
+
+class FixedRetry(RetryPolicy):
+    """One retry after a flat 10 second pause, as the engine used to do."""
+
+    def __init__(self):
+        super().__init__(max_attempts=2, budget=RetryBudget(ratio=1, reserve=float("inf")))
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        return 10.0
+
+
+def make_limiter(strategy: str, rate: float, max_rate: float) -> RateLimiter:
+    if strategy == "fixed":
+        return RateLimiter(host_rate=rate, global_rate=0, max_rate=rate, increase=0, decrease=1, retry=FixedRetry())
+    return RateLimiter(host_rate=rate, global_rate=0, max_rate=max_rate)
+
+
+async def origin_throttled(origin: str) -> int:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{origin}/stats")).json()["throttled"]
+
+
+async def run(strategy: str, rate: float, max_rate: float, requests: int, concurrency: int, origin: str) -> dict:
+    limiter = make_limiter(strategy, rate, max_rate)
+    urls = [f"{origin}/articles/{strategy}-{rate}-{i}" for i in range(requests)]
+    throttled_before = await origin_throttled(origin)
+    start = time.perf_counter()
+    async with FetchEngine(max_concurrency=concurrency, cache=False, limiter=limiter) as engine:
+        results = await engine.get_many(urls)
+    seconds = time.perf_counter() - start
+    ok = sum(not isinstance(r, Exception) for r in results)
+    stats = limiter.stats()
+    return {
+        "strategy": strategy,
+        "start_rate": rate,
+        "ok": ok,
+        "failed": requests - ok,
+        "429s": await origin_throttled(origin) - throttled_before,
+        "retries": stats["retries"],
+        "final_rate": next(iter(stats["hosts"].values()))["rate"],
+        "seconds": round(seconds, 2),
+        "ok_per_sec": round(ok / seconds, 2),
+    }
+
+
+async def main(args):
+    origin = f"http://127.0.0.1:{ORIGIN_PORT}"
+    rows = []
+    for rate in args.rates:
+        for strategy in ("fixed", "adaptive"):
+            rows.append(await run(strategy, rate, args.max_rate, args.requests, args.concurrency, origin))
+            await asyncio.sleep(1.5)  # let the origin's allowance refill between runs
+    columns = list(rows[0])
+    print(" ".join(f"{c:>11}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{row[c]:>11}" for c in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=float, default=10, help="Requests/sec the fake origin serves before 429ing.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rates", type=float, nargs="+", default=[4, 16], help="Starting per-host rates to try.")
+    parser.add_argument("--max-rate", type=float, default=20, help="Ceiling for the adaptive controller.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    origin_process = start_in_subprocess(ORIGIN_PORT, latency=args.latency, jitter=0.01, capacity=args.capacity)
+    try:
+        asyncio.run(main(args))
+    finally:
+        origin_process.terminate()
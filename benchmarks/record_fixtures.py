@@ -0,0 +1,108 @@
+# benchmarks/record_fixtures.py
+
+"""
+Records live Radiopaedia pages for offline replay by fake_origin.py: the search
+pages of each target, every article/case they list and (with --images) the
+case thumbnails, fetched politely through the scraper's own FetchEngine and
+rate limiter. The recording is a directory of response bodies plus an
+index.json keyed by request path and query, which fake_origin.py --recording
+serves back with the configured latency, jitter and 429 injection.
+
+    python benchmarks/record_fixtures.py --out recordings/chest cases:system:Chest articles:recent --pages 2 --images
+"""
+
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import argparse
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import crawler
+from fetcher import FetchEngine, ORIGIN
+from extractors import get_extractor
+from fake_origin import EXTERNAL_PREFIX
+
+
+def recording_key(url: str) -> str:
+    """The path and query fake_origin.py will see when the scraper requests `url` from it."""
+    parts = httpx.URL(url)
+    key = parts.raw_path.decode()
+    if parts.host not in (urlsplit(ORIGIN).hostname, "radiopaedia.org", "www.radiopaedia.org"):
+        key = f"{EXTERNAL_PREFIX}{parts.host}{key}"
+    return key
+
+
+class Recorder:
+    def __init__(self, out: str):
+        self.out = out
+        self.entries = {}
+        os.makedirs(os.path.join(out, "bodies"), exist_ok=True)
+
+    async def fetch(self, engine: FetchEngine, url: str):
+        key = recording_key(url)
+        if key in self.entries:
+            return None
+        response = await engine.get(url)
+        file = os.path.join("bodies", hashlib.sha1(key.encode()).hexdigest())
+        with open(os.path.join(self.out, file), "wb") as f:
+            f.write(response.content)
+        self.entries[key] = {"file": file, "content_type": response.headers.get("content-type", "text/html"), "url": url}
+        return response
+
+    def save(self):
+        with open(os.path.join(self.out, "index.json"), "w") as f:
+            json.dump({"origin": ORIGIN, "entries": self.entries}, f, indent=1)
+
+
+async def record(targets: list, pages: int, out: str, images: bool, concurrency: int):
+    import api_main
+    extractor = get_extractor()
+    recorder = Recorder(out)
+
+    async def detail(engine: FetchEngine, url: str, image_url: str = None):
+        try:
+            await recorder.fetch(engine, url)
+            if images and image_url:
+                await recorder.fetch(engine, image_url)
+        except httpx.HTTPError as e:
+            print(f"  skipped {url}: {e}")
+
+    async with FetchEngine(max_concurrency=concurrency) as engine:
+        for scope, filter_, name in targets:
+            if scope == "cases":
+                template = api_main._cases_url_template(system=name)
+            else:
+                template = api_main._articles_url_template(**({filter_: name} if name else {}))
+            for pg in range(1, pages + 1):
+                response = await recorder.fetch(engine, template.format(page=pg))
+                if response is None:
+                    continue
+                if scope == "cases":
+                    results = [(ORIGIN + r["href"], r.get("image_url")) for r in extractor.case_results(response.content)]
+                else:
+                    results = [(ORIGIN + href, None) for href in extractor.article_links(response.content)]
+                await asyncio.gather(*(detail(engine, url, image_url) for url, image_url in results))
+                print(f"{scope} {filter_} {name or ''} page {pg}: {len(results)} entries, {len(recorder.entries)} responses recorded")
+                recorder.save()
+    recorder.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="+", help="Targets as for the crawler, e.g. cases:system:Chest or articles:recent.")
+    parser.add_argument("--out", required=True, help="Directory to write the recording to.")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--images", action="store_true", help="Also record case thumbnails.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    targets = [target for spec in args.targets for target in crawler.parse_target(spec)]
+    asyncio.run(record(targets, args.pages, args.out, args.images, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/records_benchmark.py
+
+"""
+Memory and serialization benchmark of scraped records: the plain dicts the
+scrapers used to build against the slotted Case/Article records, and the
+stdlib-json JSONResponse body against the orjson one, in the per-page records
+layout and the flat column layout.
+
+Records are parsed from the fake origin's synthetic pages and then varied per
+record the way a real harvest varies (URL, ID, text); each string is a fresh
+object, as it would be straight out of the parser, so interning has the same
+effect it has on a real scrape. Memory (everything a record keeps alive, and
+the dict or record object alone) is measured with tracemalloc in a separate
+process per representation.
+
+    python benchmarks/records_benchmark.py --records 20000
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import get_extractor
+from records import Article, Case, dumps, columns
+import fake_origin
+
+PAGE_SIZE = 20
+# A harvest has far fewer distinct patient data strings and dates than records.
+DISTINCT_VALUES = 60
+
+
+def _fresh(text: str) -> str:
+    """A new str object with the same value, as the parser would return."""
+    return (" " + text)[1:] if text else text
+
+
+def build_fields(scope: str, count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    extractor = get_extractor()
+    if scope == "cases":
+        template = extractor.case_detail(fake_origin.case_page("case-0").encode())
+        repeated = "patient_data"
+    else:
+        template = extractor.article_detail(fake_origin.article_page("article-0").encode())
+        repeated = "date"
+    shared = [f"{template.get(repeated, '')} {n}" for n in range(DISTINCT_VALUES)]
+    rows = []
+    for n in range(count):
+        fields = {key: _fresh(f"{value} {n}") if key != repeated else _fresh(rng.choice(shared)) for key, value in template.items()}
+        if scope == "cases":
+            fields = {"patient_id": str(uuid.UUID(int=rng.getrandbits(128))), "url": f"https://radiopaedia.org/cases/case-{n}", **fields,
+                      "title": _fresh(f"Case {n}"), "image_url": f"https://prod-images-static.radiopaedia.org/images/{n}/thumb.jpg"}
+        else:
+            fields = {"article_id": str(uuid.UUID(int=rng.getrandbits(128))), "url": f"https://radiopaedia.org/articles/article-{n}", **fields}
+        rows.append(fields)
+    return rows
+
+
+def build_data(scope: str, count: int, kind: str) -> dict:
+    record = (Case if scope == "cases" else Article).from_fields
+    rows = build_fields(scope, count)
+    data = {}
+    for n, fields in enumerate(rows):
+        data.setdefault(f"page_{n // PAGE_SIZE + 1}", []).append(record(fields) if kind == "record" else fields)
+    return data
+
+
+def stdlib_body(content) -> bytes:
+    # What starlette's JSONResponse does.
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def measure_memory(scope: str, count: int, kind: str) -> dict:
+    """Runs inside a child process so one representation's allocations don't affect the other's."""
+    record = (Case if scope == "cases" else Article).from_fields
+    get_extractor()
+    tracemalloc.start()
+    rows = build_fields(scope, count)
+    kept = rows if kind == "dict" else [record(fields) for fields in rows]
+    del rows
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The container alone, without the strings it holds.
+    container = sum(sys.getsizeof(item) for item in kept) / len(kept)
+    return {"bytes_per_record": retained / len(kept), "container_bytes": container}
+
+
+def time_it(func, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--scopes", nargs="+", default=["cases", "articles"], choices=["cases", "articles"])
+    parser.add_argument("--rounds", type=int, default=5, help="Serialization rounds; the best is reported.")
+    parser.add_argument("--memory", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memory:
+        print(json.dumps(measure_memory(args.memory[0], args.records, args.memory[1])))
+        return
+
+    for scope in args.scopes:
+        memory = {}
+        for kind in ("dict", "record"):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--records", str(args.records), "--memory", scope, kind],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            memory[kind] = json.loads(output.strip().splitlines()[-1])
+        print(f"{scope}: {args.records} records")
+        for metric, label in (("bytes_per_record", "memory"), ("container_bytes", "  container")):
+            dict_bytes, record_bytes = memory["dict"][metric], memory["record"][metric]
+            print(f"  {label:<12} dicts {dict_bytes:9.0f} B/record   records {record_bytes:9.0f} B/record"
+                  f"   ({(1 - record_bytes / dict_bytes) * 100:.0f}% less)")
+
+        dicts, records = build_data(scope, args.records, "dict"), build_data(scope, args.records, "record")
+        if json.loads(dumps({"data": records})) != json.loads(stdlib_body({"data": dicts})):
+            print("  RECORDS SERIALIZE DIFFERENTLY from dicts")
+            sys.exit(1)
+        bodies = {
+            "dicts + json": lambda: stdlib_body({"data": dicts}),
+            "records + orjson": lambda: dumps({"data": records}),
+            "columns + orjson": lambda: dumps({"data": columns(records)}),
+        }
+        for name, body in bodies.items():
+            seconds = time_it(body, args.rounds)
+            print(f"  {name:<18} {seconds * 1000:8.1f} ms  {args.records / seconds:10.0f} records/s  {len(body()) / 1024:8.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
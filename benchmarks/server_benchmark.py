@@ -0,0 +1,109 @@
+# benchmarks/server_benchmark.py
+
+"""
+Throughput of the standalone API server by worker count: server.py is started
+with 1, 2, ... workers against a local fake Radiopaedia and kept busy with
+concurrent scrape requests for a fixed time, reporting completed requests/sec.
+Parsing and serialisation are CPU bound, so throughput should grow with
+workers up to the number of cores.
+
+    python benchmarks/server_benchmark.py --workers 1 2 4 --clients 16 --seconds 20
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_origin import start_in_subprocess
+
+ORIGIN_PORT = 8769
+API_PORT = 8770
+
+
+def start_server(workers: int, workdir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "RADIOPAEDIA_ORIGIN": f"http://127.0.0.1:{ORIGIN_PORT}",
+        "SCRAPER_HOST_RATE": "0",
+        "SCRAPER_GLOBAL_RATE": "0",
+        "SCRAPER_CACHE_PATH": "",
+        "SCRAPER_DEDUP_PATH": "",
+        "SCRAPER_SEARCH_INDEX_PATH": "",
+        "SCRAPER_JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite"),
+    }
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py"), "--host", "127.0.0.1", "--port", str(API_PORT), "--workers", str(workers)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{API_PORT}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"API server did not start with {workers} workers")
+
+
+async def load(clients: int, seconds: float, path: str) -> tuple:
+    done = failed = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal done, failed
+        while time.perf_counter() < deadline:
+            response = await client.get(path)
+            if response.status_code == 200:
+                done += 1
+            else:
+                failed += 1
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{API_PORT}", timeout=600, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    return done, failed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client connections.")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--path", default="/articles/recent?pages=1", help="Endpoint each client requests in a loop.")
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, GET {args.path}")
+    origin = start_in_subprocess(ORIGIN_PORT, latency=args.latency, jitter=0.005)
+    try:
+        baseline = None
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory(prefix="server_benchmark_") as workdir:
+                server = start_server(workers, workdir)
+                try:
+                    done, failed, elapsed = asyncio.run(load(args.clients, args.seconds, args.path))
+                finally:
+                    server.terminate()
+                    server.wait()
+            throughput = done / elapsed
+            baseline = baseline or throughput
+            print(f"{workers:2d} workers: {done:5d} requests  {throughput:7.2f} req/s  ({throughput / baseline:4.2f}x)"
+                  + (f"  {failed} failed" if failed else ""))
+    finally:
+        origin.terminate()
+
+
+if __name__ == "__main__":
+    main()
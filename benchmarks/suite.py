@@ -0,0 +1,232 @@
+# benchmarks/suite.py
+
+"""
+End-to-end benchmark suite. Runs against the local fake Radiopaedia (synthetic
+pages, or a recording from record_fixtures.py) with the given latency, jitter
+and 429 injection, and measures per scenario, each in a fresh process:
+
+  parse            pages/sec and MB/sec of the configured extractor over the
+                   fixture pages
+  <scope>.<n>p     a /jobs scrape of n recent-feed pages: records/sec, scrape
+                   time and peak RSS growth, then the latency of fetching the
+                   result as JSON and as Excel, plus (n <= 5) the direct
+                   GET /<scope>/recent?pages=n latency
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json and
+compared with the latest earlier run made with the same settings, flagging
+metrics that got worse by more than --tolerance, so regressions between
+commits are visible.
+
+    python benchmarks/suite.py --quick
+    python benchmarks/suite.py --pages 1 5 20 50 --latency 0.05 --throttle-ratio 0.02
+    python benchmarks/suite.py --recording recordings/chest
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ORIGIN_PORT = 8771
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCOPES = ("articles", "cases")
+RESULT_FORMATS = ("json", "excel")
+# Metrics where a larger value is better; for every other metric smaller is better.
+HIGHER_IS_BETTER = ("records_per_sec", "pages_per_sec", "mb_per_sec")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_parse(rounds: int) -> dict:
+    from extractors import get_extractor
+    from parse_benchmark import FIXTURES_DIR, KINDS, load_fixtures
+    pages = load_fixtures(FIXTURES_DIR, synthetic=5)
+    extractor = get_extractor()
+    size = sum(len(content) for _, _, content in pages)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for kind, _, content in pages:
+            getattr(extractor, KINDS[kind])(content)
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_sec": rounds * len(pages) / elapsed,
+        "mb_per_sec": rounds * size / elapsed / 1e6,
+        "backend": extractor.name,
+    }
+
+
+async def run_scrape(scope: str, pages: int) -> dict:
+    import httpx
+    import api_main
+    baseline = peak_rss_mb()
+    metrics = {}
+    transport = httpx.ASGITransport(app=api_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=3600) as client:
+        start = time.perf_counter()
+        job = (await client.post("/jobs", json={"scope": scope, "filter": "recent", "pages": pages})).json()
+        while job["status"] in ("queued", "running"):
+            await asyncio.sleep(0.05)
+            job = (await client.get(f"/jobs/{job['job_id']}")).json()
+        scrape_seconds = time.perf_counter() - start
+        if job["status"] != "succeeded":
+            raise RuntimeError(job["error"])
+        records = sum(job["records_per_page"].values())
+        metrics.update(records=records, scrape_seconds=scrape_seconds, records_per_sec=records / scrape_seconds)
+
+        for file_format in RESULT_FORMATS:
+            start = time.perf_counter()
+            response = await client.get(f"/jobs/{job['job_id']}/result", params={"file_format": file_format})
+            response.raise_for_status()
+            metrics[f"result_{file_format}_ms"] = (time.perf_counter() - start) * 1000
+            metrics[f"result_{file_format}_kb"] = len(response.content) / 1024
+
+        if pages <= 5:
+            start = time.perf_counter()
+            response = await client.get(f"/{scope}/recent", params={"pages": pages})
+            response.raise_for_status()
+            metrics["direct_json_seconds"] = time.perf_counter() - start
+    metrics["rss_growth_mb"] = peak_rss_mb() - baseline
+    return metrics
+
+
+def run_scenario(spec: dict) -> dict:
+    """Runs inside a child process so RSS and caches reflect this scenario alone."""
+    if spec["kind"] == "parse":
+        return run_parse(spec["rounds"])
+    return asyncio.run(run_scrape(spec["scope"], spec["pages"]))
+
+
+def git_commit() -> tuple:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return git("rev-parse", "--short", "HEAD") or "unknown", bool(git("status", "--porcelain", "--untracked-files=no"))
+
+
+def flatten(results: dict) -> dict:
+    return {
+        f"{scenario}.{name}": value
+        for scenario, metrics in results.items() for name, value in metrics.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+def compare(previous: dict, current: dict, tolerance: float) -> list:
+    """Returns `(metric, before, after, change)` for every metric present in both runs, change in % (positive = worse)."""
+    rows = []
+    before, after = flatten(previous["results"]), flatten(current["results"])
+    for metric in sorted(before.keys() & after.keys()):
+        if metric.endswith(("records", "_kb")) or not before[metric]:
+            continue
+        change = (after[metric] - before[metric]) / before[metric] * 100
+        if metric.endswith(HIGHER_IS_BETTER):
+            change = -change
+        rows.append((metric, before[metric], after[metric], change, change > tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 50], help="Search pages per scrape scenario (1-50).")
+    parser.add_argument("--scopes", nargs="+", default=list(SCOPES), choices=SCOPES)
+    parser.add_argument("--quick", action="store_true", help="Only 1 and 5 pages.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake origin response latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--throttle-ratio", type=float, default=0, help="Share of origin requests answered with 429.")
+    parser.add_argument("--recording", help="Replay a recording from record_fixtures.py instead of synthetic pages.")
+    parser.add_argument("--parse-rounds", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=10, help="Percent change counted as a regression.")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--no-save", action="store_true", help="Compare with the previous run without storing this one.")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return
+
+    pages = [1, 5] if args.quick else args.pages
+    scenarios = {"parse": {"kind": "parse", "rounds": args.parse_rounds}}
+    for scope in args.scopes:
+        for n in pages:
+            scenarios[f"{scope}.{n}p"] = {"kind": "scrape", "scope": scope, "pages": n}
+
+    from fake_origin import start_in_subprocess
+    origin = start_in_subprocess(ORIGIN_PORT, latency=args.latency, jitter=args.jitter,
+                                 throttle_ratio=args.throttle_ratio, recording=args.recording)
+    results = {}
+    try:
+        for name, spec in scenarios.items():
+            with tempfile.TemporaryDirectory(prefix="suite_") as workdir:
+                env = {
+                    **os.environ,
+                    "RADIOPAEDIA_ORIGIN": f"http://127.0.0.1:{ORIGIN_PORT}",
+                    "SCRAPER_HOST_RATE": os.environ.get("SCRAPER_HOST_RATE", "0"),
+                    "SCRAPER_GLOBAL_RATE": os.environ.get("SCRAPER_GLOBAL_RATE", "0"),
+                    "SCRAPER_CACHE_PATH": "",
+                    "SCRAPER_DEDUP_PATH": "",
+                    "SCRAPER_SEARCH_INDEX_PATH": "",
+                    "SCRAPER_JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite"),
+                    "SCRAPER_RESULT_DIR": os.path.join(workdir, "results"),
+                }
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--scenario", json.dumps(spec)],
+                    cwd=workdir, env=env, capture_output=True, text=True,
+                )
+            if output.returncode != 0:
+                print(f"{name:>14}: failed\n{output.stderr[-2000:]}")
+                continue
+            results[name] = json.loads(output.stdout.strip().splitlines()[-1])
+            print(f"{name:>14}: " + "  ".join(
+                f"{metric}={value:.2f}" if isinstance(value, float) else f"{metric}={value}"
+                for metric, value in results[name].items()
+            ))
+    finally:
+        origin.terminate()
+
+    commit, dirty = git_commit()
+    run = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"latency": args.latency, "jitter": args.jitter, "throttle_ratio": args.throttle_ratio,
+                     "recording": args.recording, "cpus": os.cpu_count()},
+        "results": results,
+    }
+    previous = None
+    for path in sorted(glob.glob(os.path.join(args.results_dir, "*.json")), reverse=True):
+        with open(path) as f:
+            candidate = json.load(f)
+        if candidate["settings"] == run["settings"]:
+            previous = candidate
+            break
+    if previous is None:
+        print("\nNo earlier run with the same settings to compare with.")
+    else:
+        rows = compare(previous, run, args.tolerance)
+        print(f"\nCompared with {previous['commit']}{' (dirty)' if previous['dirty'] else ''} from {previous['created_at']}:")
+        for metric, before, after, change, regressed in rows:
+            print(f"  {metric:<36} {before:10.2f} -> {after:10.2f}  {change:+6.1f}% {'REGRESSION' if regressed else ''}")
+        regressions = sum(1 for row in rows if row[-1])
+        print(f"{regressions} regression(s) beyond {args.tolerance:g}%.")
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{commit}.json")
+        with open(path, "w") as f:
+            json.dump(run, f, indent=1)
+        print(f"Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
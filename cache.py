@@ -0,0 +1,137 @@
+# cache.py
+
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+import httpx
+from storage import open_database, lru_victims
+
+CACHE_PATH = os.environ.get("SCRAPER_CACHE_PATH", "http_cache.sqlite")
+CACHE_MAX_BYTES = int(float(os.environ.get("SCRAPER_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+# Freshness lifetime in seconds per URL class. Search listings change often,
+# article/case pages rarely, images practically never.
+CACHE_TTLS = {
+    "search": float(os.environ.get("SCRAPER_CACHE_TTL_SEARCH", "600")),
+    "detail": float(os.environ.get("SCRAPER_CACHE_TTL_DETAIL", "86400")),
+    "image": float(os.environ.get("SCRAPER_CACHE_TTL_IMAGE", "604800")),
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+def url_class(url: str) -> str:
+    path = urlsplit(url).path.lower()
+    if path.startswith("/search"):
+        return "search"
+    if path.endswith(IMAGE_EXTENSIONS):
+        return "image"
+    return "detail"
+
+
+class CachedResponse:
+    def __init__(self, url: str, status: int, headers: dict, content: bytes, fetched_at: float):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.fetched_at = fetched_at
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.fetched_at < CACHE_TTLS[url_class(self.url)]
+
+    @property
+    def validators(self) -> dict:
+        """Conditional request headers built from the stored ETag/Last-Modified."""
+        validators = {}
+        if etag := self.headers.get("etag"):
+            validators["If-None-Match"] = etag
+        if last_modified := self.headers.get("last-modified"):
+            validators["If-Modified-Since"] = last_modified
+        return validators
+
+    def to_response(self) -> httpx.Response:
+        return httpx.Response(self.status, headers=self.headers, content=self.content, request=httpx.Request("GET", self.url))
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache keyed by URL, backed by SQLite. Entries are
+    evicted least-recently-used first once the stored bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = open_database(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, status INTEGER, headers TEXT, content BLOB,"
+            " size INTEGER, fetched_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def lookup(self, url: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, content, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        status, headers, content, fetched_at = row
+        return CachedResponse(url, status, json.loads(headers), content, fetched_at)
+
+    def store(self, url: str, response: httpx.Response):
+        if response.status_code != 200 or "no-store" in response.headers.get("cache-control", ""):
+            return
+        headers = {key: value for key, value in response.headers.items() if key in ("content-type", "etag", "last-modified")}
+        content = response.content
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, json.dumps(headers), content, len(content), now, now),
+            )
+            self._evict()
+
+    def refresh(self, url: str):
+        """Marks a cached entry as fresh again after the origin answered 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+
+    def _evict(self):
+        self._db.executemany("DELETE FROM responses WHERE url = ?", lru_victims(self._db, "responses", "url", self.max_bytes))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.revalidated + self.misses
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.revalidated) / lookups, 4) if lookups else 0.0,
+        }
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Process-wide cache shared by every FetchEngine; None when SCRAPER_CACHE_PATH is empty."""
+    global _default_cache
+    if _default_cache is None and CACHE_PATH:
+        _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,326 @@
+# crawler.py
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ratelimit import RateLimiter, SharedTokenBucket, set_rate_limiter, HOST_RATE, HOST_BURST, GLOBAL_RATE
+
+CRAWL_DIR = os.environ.get("SCRAPER_CRAWL_DIR", "crawls")
+CRAWL_WORKERS = int(os.environ.get("SCRAPER_CRAWL_WORKERS", "4"))
+SHARD_PAGES = int(os.environ.get("SCRAPER_CRAWL_SHARD_PAGES", "10"))
+
+_running = set()
+_running_lock = threading.Lock()
+
+
+def parse_target(spec: str) -> list:
+    """
+    Expands a target such as `cases:system:Chest`, `articles:section:*` or
+    `articles:recent` into `(scope, filter, name)` tuples; `*` stands for every
+    known section or system.
+    """
+    scope, _, rest = spec.partition(":")
+    filter_, _, name = rest.partition(":")
+    filter_ = filter_ or "recent"
+    if scope not in ("articles", "cases") or filter_ not in ("recent", "section", "system"):
+        raise ValueError(f"Invalid crawl target '{spec}'; expected <articles|cases>:<recent|section|system>[:<name>|*].")
+    if scope == "cases" and filter_ == "section":
+        raise ValueError("Cases can only be filtered by system.")
+    if filter_ == "recent":
+        return [(scope, filter_, None)]
+    if not name:
+        raise ValueError(f"Crawl target '{spec}' needs a {filter_} name or '*'.")
+    if name != "*":
+        return [(scope, filter_, name)]
+    import api_main  # imported here because api_main imports this module
+    names = {
+        ("articles", "section"): api_main.ArticleSectionName,
+        ("articles", "system"): api_main.ArticleSystemName,
+        ("cases", "system"): api_main.CaseSystemName,
+    }[(scope, filter_)]
+    return [(scope, filter_, member.value) for member in names]
+
+
+def plan_shards(targets: list, pages: int, shard_pages: int = SHARD_PAGES) -> list:
+    """Splits pages 1..`pages` of every target into shards of `shard_pages` consecutive pages."""
+    shards = []
+    for spec in targets:
+        for scope, filter_, name in parse_target(spec):
+            label = "".join(c if c.isalnum() else "_" for c in name) if name else "all"
+            for first in range(1, pages + 1, shard_pages):
+                last = min(pages, first + shard_pages - 1)
+                shards.append({
+                    "id": f"{scope}-{filter_}-{label}-{first:05d}-{last:05d}",
+                    "scope": scope, "filter": filter_, "name": name,
+                    "first_page": first, "last_page": last,
+                })
+    return shards
+
+
+def _run_dir(run_id: str) -> str:
+    return os.path.join(CRAWL_DIR, run_id)
+
+
+def _checkpoint_path(run_id: str, shard: dict) -> str:
+    return os.path.join(_run_dir(run_id), f"{shard['id']}.jsonl")
+
+
+def _write_manifest(manifest: dict):
+    manifest["updated_at"] = time.time()
+    path = os.path.join(_run_dir(manifest["run_id"]), "manifest.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def load_manifest(run_id: str) -> dict:
+    path = os.path.join(_run_dir(run_id), "manifest.json")
+    if not os.path.exists(path):
+        raise KeyError(run_id)
+    with open(path) as f:
+        return json.load(f)
+
+
+def create_run(targets: list, pages: int, shard_pages: int = SHARD_PAGES) -> dict:
+    """Plans a crawl and writes its manifest; nothing is fetched until `run_crawl`."""
+    shards = plan_shards(targets, pages, shard_pages)
+    run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    os.makedirs(_run_dir(run_id), exist_ok=True)
+    manifest = {
+        "run_id": run_id, "targets": targets, "pages": pages, "shard_pages": shard_pages,
+        "shards": shards, "status": "planned", "created_at": time.time(), "attempts": [],
+    }
+    _write_manifest(manifest)
+    return manifest
+
+
+def completed_pages(path: str) -> dict:
+    """
+    Returns `{page: record count}` for the pages checkpointed in a shard file.
+    A torn last line from a crash is ignored, so that page is simply crawled again.
+    """
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                done[entry["page"]] = len(entry["records"])
+    return done
+
+
+def iter_records(run_id: str):
+    """Yields `(shard id, page, record)` for everything a run has checkpointed so far."""
+    for shard in load_manifest(run_id)["shards"]:
+        path = _checkpoint_path(run_id, shard)
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                for record in entry["records"]:
+                    yield shard["id"], entry["page"], record
+
+
+async def _crawl_shard(run_id: str, shard: dict, concurrency: int = None) -> dict:
+    path = _checkpoint_path(run_id, shard)
+    done = completed_pages(path)
+    pending = [pg for pg in range(shard["first_page"], shard["last_page"] + 1) if pg not in done]
+    summary = {"id": shard["id"], "pages": 0, "records": 0, "error": None}
+    if not pending:
+        return summary
+
+    import api_main
+    if shard["scope"] == "articles":
+        template = api_main._articles_url_template(**{shard["filter"]: shard["name"]} if shard["name"] else {})
+        events = api_main._iter_articles_from_url(template, len(pending), concurrency, page_numbers=pending)
+    else:
+        template = api_main._cases_url_template(system=shard["name"])
+        events = api_main._iter_cases_from_url(template, len(pending), concurrency=concurrency, page_numbers=pending)
+
+    # Each page is appended and fsynced as soon as it completes, so a crash
+    # loses at most the pages that were still in flight.
+    page_records = {}
+    with open(path, "a") as f:
+        try:
+            async for pg, position, record in events:
+                if position is not None:
+                    page_records.setdefault(pg, {})[position] = record
+                    continue
+                records = page_records.pop(pg, {})
+                f.write(json.dumps({"page": pg, "records": [dict(records[i]) for i in sorted(records)]}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                summary["pages"] += 1
+                summary["records"] += len(records)
+        except Exception as e:
+            summary["error"] = str(e)
+    return summary
+
+
+def _init_worker(host_bucket: SharedTokenBucket, global_bucket: SharedTokenBucket):
+    set_rate_limiter(RateLimiter(host_bucket=host_bucket, global_bucket=global_bucket))
+
+
+def _run_shard(run_id: str, shard: dict, concurrency: int = None) -> dict:
+    """Crawls one shard inside a pool worker. Failures are reported in the summary, not raised, so the other shards carry on."""
+    return asyncio.run(_crawl_shard(run_id, shard, concurrency))
+
+
+def run_crawl(run_id: str, workers: int = CRAWL_WORKERS, rate: float = GLOBAL_RATE, concurrency: int = None) -> dict:
+    """
+    Crawls every page of the run that isn't checkpointed yet, one shard per
+    pool process at a time, and returns a report with the aggregate pages/min.
+    All workers pace their requests through the same shared buckets, so the
+    total rate stays within `rate` requests/sec however many there are.
+    Calling it again on an unfinished run resumes where it stopped.
+    """
+    manifest = load_manifest(run_id)
+    pending = [
+        shard for shard in manifest["shards"]
+        if len(completed_pages(_checkpoint_path(run_id, shard))) < shard["last_page"] - shard["first_page"] + 1
+    ]
+    manifest["status"] = "running"
+    manifest["pid"] = os.getpid()
+    _write_manifest(manifest)
+
+    context = multiprocessing.get_context("spawn")  # forking a threaded server process is unsafe
+    host_bucket = SharedTokenBucket(HOST_RATE, HOST_BURST, context)
+    global_bucket = SharedTokenBucket(rate, HOST_BURST, context)
+    results = []
+    started_at = time.time()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(host_bucket, global_bucket)) as pool:
+        futures = [pool.submit(_run_shard, run_id, shard, concurrency) for shard in pending]
+        for future in as_completed(futures):
+            results.append(future.result())
+    seconds = time.perf_counter() - start
+
+    pages = sum(r["pages"] for r in results)
+    errors = {r["id"]: r["error"] for r in results if r["error"]}
+    report = {
+        "started_at": started_at,
+        "workers": workers,
+        "rate": rate,
+        "shards": len(pending),
+        "pages": pages,
+        "records": sum(r["records"] for r in results),
+        "seconds": round(seconds, 2),
+        "pages_per_min": round(pages / seconds * 60, 1) if seconds else 0.0,
+        "errors": errors,
+    }
+    manifest = load_manifest(run_id)
+    manifest["attempts"].append(report)
+    manifest["status"] = "incomplete" if errors else "finished"
+    _write_manifest(manifest)
+    return report
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+def crawl_status(run_id: str) -> dict:
+    """
+    Progress of a run as recorded in its manifest and checkpoint files. A run
+    whose crawling process has gone away without finishing is `interrupted`
+    and can be resumed.
+    """
+    manifest = load_manifest(run_id)
+    shards = []
+    for shard in manifest["shards"]:
+        done = completed_pages(_checkpoint_path(run_id, shard))
+        shards.append({
+            "id": shard["id"],
+            "pages_total": shard["last_page"] - shard["first_page"] + 1,
+            "pages_done": len(done),
+            "records": sum(done.values()),
+        })
+    with _running_lock:
+        running_here = run_id in _running
+    status = "running" if running_here else manifest["status"]
+    if status == "running" and not running_here and not _alive(manifest.get("pid")):
+        status = "interrupted"
+    return {
+        "run_id": run_id,
+        "status": status,
+        "targets": manifest["targets"],
+        "directory": os.path.abspath(_run_dir(run_id)),
+        "pages_total": sum(s["pages_total"] for s in shards),
+        "pages_done": sum(s["pages_done"] for s in shards),
+        "records": sum(s["records"] for s in shards),
+        "attempts": manifest["attempts"],
+        "error": manifest.get("error"),
+        "shards": shards,
+    }
+
+
+def start_in_background(run_id: str, workers: int = CRAWL_WORKERS, rate: float = GLOBAL_RATE, concurrency: int = None) -> bool:
+    """Runs `run_crawl` on a background thread; returns False if the run is already going in this process."""
+    with _running_lock:
+        if run_id in _running:
+            return False
+        _running.add(run_id)
+
+    def target():
+        try:
+            run_crawl(run_id, workers, rate, concurrency)
+        except Exception as e:
+            manifest = load_manifest(run_id)
+            manifest["status"] = "failed"
+            manifest["error"] = str(e)
+            _write_manifest(manifest)
+        finally:
+            with _running_lock:
+                _running.discard(run_id)
+
+    threading.Thread(target=target, name=f"crawl-{run_id}", daemon=True).start()
+    return True
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Sharded multi-process crawl of whole Radiopaedia sections/systems.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    start = commands.add_parser("start", help="Plan and run a new crawl.")
+    start.add_argument("targets", nargs="+", help="e.g. cases:system:Chest, articles:section:*, articles:recent")
+    start.add_argument("--pages", type=int, required=True, help="Search pages to crawl per target.")
+    start.add_argument("--shard-pages", type=int, default=SHARD_PAGES, help="Pages per shard (the unit of work per process).")
+    resume = commands.add_parser("resume", help="Crawl the pages an earlier run didn't finish.")
+    resume.add_argument("run_id")
+    status = commands.add_parser("status", help="Show a run's progress.")
+    status.add_argument("run_id")
+    for command in (start, resume):
+        command.add_argument("--workers", type=int, default=CRAWL_WORKERS, help="Worker processes.")
+        command.add_argument("--rate", type=float, default=GLOBAL_RATE, help="Total requests/sec across all workers.")
+        command.add_argument("--concurrency", type=int, default=None, help="Parallel detail fetches per worker.")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        print(json.dumps(crawl_status(args.run_id), indent=2))
+        return
+    run_id = create_run(args.targets, args.pages, args.shard_pages)["run_id"] if args.command == "start" else args.run_id
+    print(f"crawl {run_id}: {os.path.abspath(_run_dir(run_id))}", file=sys.stderr)
+    report = run_crawl(run_id, args.workers, args.rate, args.concurrency)
+    print(json.dumps({"run_id": run_id, **report}, indent=2))
+    sys.exit(1 if report["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# dedup.py
+
+import os
+import json
+import time
+import threading
+from storage import open_database
+
+DEDUP_PATH = os.environ.get("SCRAPER_DEDUP_PATH", "dedup.sqlite")
+# Stored records older than this are scraped again even if their search entry is unchanged.
+DEDUP_MAX_AGE = float(os.environ.get("SCRAPER_DEDUP_MAX_AGE", str(7 * 86400)))
+
+
+class DedupStore:
+    """
+    Every article/case harvested, by its stable record ID, together with the
+    fingerprint of the search-result entry it was scraped under. A later scrape
+    that lists the same entry unchanged reuses the stored record instead of
+    fetching its detail page again, as long as it is younger than `max_age`.
+    """
+
+    def __init__(self, path: str = DEDUP_PATH, max_age: float = DEDUP_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = open_database(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " id TEXT PRIMARY KEY, scope TEXT, url TEXT, fingerprint TEXT, record TEXT,"
+            " first_seen REAL, scraped_at REAL, last_seen REAL)"
+        )
+
+    def lookup(self, ids: list) -> dict:
+        """Returns `{id: (fingerprint, record, scraped_at)}` for the given IDs that have been harvested before."""
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, fingerprint, record, scraped_at FROM records WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {record_id: (fingerprint, json.loads(record), scraped_at) for record_id, fingerprint, record, scraped_at in rows}
+
+    def reusable(self, stored: tuple, fingerprint: str) -> bool:
+        """Whether a `lookup` entry can stand in for a scrape of the search entry with `fingerprint`."""
+        stored_fingerprint, _, scraped_at = stored
+        return fingerprint is not None and stored_fingerprint == fingerprint and time.time() - scraped_at < self.max_age
+
+    def put(self, scope: str, record_id: str, record: dict, fingerprint: str = None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET"
+                " url = excluded.url, fingerprint = excluded.fingerprint, record = excluded.record,"
+                " scraped_at = excluded.scraped_at, last_seen = excluded.last_seen",
+                (record_id, scope, record['url'], fingerprint, json.dumps(record), now, now, now),
+            )
+
+    def touch(self, ids: list):
+        now = time.time()
+        with self._lock:
+            self._db.executemany("UPDATE records SET last_seen = ? WHERE id = ?", [(now, record_id) for record_id in ids])
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT scope, COUNT(*) FROM records GROUP BY scope").fetchall()
+        return {"records": dict(rows), "max_age_seconds": self.max_age}
+
+
+_default_store = None
+
+
+def get_dedup_store():
+    """Process-wide dedup store; None when SCRAPER_DEDUP_PATH is empty."""
+    global _default_store
+    if _default_store is None and DEDUP_PATH:
+        _default_store = DedupStore()
+    return _default_store
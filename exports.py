@@ -0,0 +1,127 @@
+# exports.py
+
+import os
+import io
+import csv
+from openpyxl import Workbook
+
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter is optional; openpyxl's write-only mode is the fallback
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only the Parquet export needs it
+    pa = None
+
+PARQUET_COMPRESSION = os.environ.get("SCRAPER_PARQUET_COMPRESSION", "zstd")
+PARQUET_ROW_GROUP_ROWS = int(os.environ.get("SCRAPER_PARQUET_ROW_GROUP_ROWS", "1000"))
+CSV_FLUSH_ROWS = 200
+
+EXPORT_MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _columns(records) -> list:
+    """Union of the records' keys in first-seen order, as a DataFrame would lay them out."""
+    columns = {}
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+def _all_records(data: dict):
+    for records in data.values():
+        yield from records
+
+
+def _sheets(data: dict):
+    """Yields `(sheet name, columns, rows)` for each non-empty page."""
+    for page_key, records in data.items():
+        if records:
+            columns = _columns(records)
+            yield f"Page {page_key.replace('page_', '')}", columns, ([record.get(column) for column in columns] for record in records)
+
+
+def write_excel(data: dict, path: str):
+    """
+    Writes one sheet per page without holding the workbook in memory: with
+    xlsxwriter's constant_memory mode each row is flushed to disk as it is
+    written and strings are stored inline, otherwise openpyxl's write-only
+    mode streams rows (but keeps a shared-strings table in memory).
+    """
+    if xlsxwriter is not None:
+        options = {"constant_memory": True, "strings_to_urls": False, "strings_to_formulas": False, "strings_to_numbers": False}
+        with xlsxwriter.Workbook(path, options) as workbook:
+            for name, columns, rows in _sheets(data):
+                sheet = workbook.add_worksheet(name)
+                sheet.write_row(0, 0, columns)
+                for row_number, row in enumerate(rows, start=1):
+                    sheet.write_row(row_number, 0, row)
+            if not any(data.values()):
+                workbook.add_worksheet("No records")
+        return
+
+    workbook = Workbook(write_only=True)
+    for name, columns, rows in _sheets(data):
+        sheet = workbook.create_sheet(name)
+        sheet.append(columns)
+        for row in rows:
+            sheet.append(row)
+    if not any(data.values()):
+        workbook.create_sheet("No records")
+    workbook.save(path)
+
+
+def iter_csv(data: dict):
+    """Yields the records as CSV text a few hundred rows at a time, with a leading `page` column."""
+    columns = _columns(_all_records(data))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["page"] + columns)
+    rows = 0
+    for page_key, records in data.items():
+        page = page_key.replace('page_', '')
+        for record in records:
+            writer.writerow([page] + [record.get(column) for column in columns])
+            rows += 1
+            if rows % CSV_FLUSH_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_parquet(data: dict, path: str):
+    """
+    Writes the records in compressed row groups of about PARQUET_ROW_GROUP_ROWS
+    records, so only one row group is ever held in Arrow memory. Text columns
+    are stored plain rather than dictionary-encoded, since long free-text fields
+    rarely repeat and compress better as is.
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow installed on the server.")
+    columns = _columns(_all_records(data))
+    schema = pa.schema([("page", pa.int32())] + [(column, pa.string()) for column in columns])
+
+    def row_group(rows: list):
+        batch = {"page": [page for page, _ in rows]}
+        for column in columns:
+            batch[column] = [None if (value := record.get(column)) is None else str(value) for _, record in rows]
+        return pa.Table.from_pydict(batch, schema=schema)
+
+    with pq.ParquetWriter(path, schema, compression=PARQUET_COMPRESSION, use_dictionary=["page"]) as writer:
+        rows = []
+        for page_key, records in data.items():
+            page = int(page_key.replace('page_', ''))
+            rows.extend((page, record) for record in records)
+            if len(rows) >= PARQUET_ROW_GROUP_ROWS:
+                writer.write_table(row_group(rows))
+                rows = []
+        if rows:
+            writer.write_table(row_group(rows))
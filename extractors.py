@@ -0,0 +1,223 @@
+# extractors.py
+
+import os
+import hashlib
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import UnicodeDammit
+
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+except ImportError:  # lxml is optional; the html.parser backend always works
+    lxml = None
+
+
+SEARCH_RESULT_CLASSES = {
+    "articles": "search-result search-result-article",
+    "cases": "search-result search-result-case",
+}
+
+
+def _fingerprint(href: str, text: str) -> str:
+    """Hash of a search-result entry's link and whitespace-collapsed text."""
+    return hashlib.sha1(f"{href}\n{' '.join(text.split())}".encode("utf-8")).hexdigest()
+
+
+class SoupExtractor:
+    """
+    Reference extractor: builds a BeautifulSoup tree with the stdlib html.parser.
+    Search pages are strained down to their <a> elements, which is all that is
+    read from them; detail pages are parsed in full.
+    """
+
+    name = "html.parser"
+
+    def article_links(self, content: bytes) -> list:
+        soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("a"))
+        return [a.get("href") for a in soup.find_all("a", {"class": "search-result search-result-article"})]
+
+    def search_entries(self, content: bytes, scope: str) -> list:
+        """Returns `{'href', 'fingerprint'}` for each article/case entry on a search page."""
+        soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("a"))
+        return [
+            {'href': a.get("href"), 'fingerprint': _fingerprint(a.get("href"), a.text)}
+            for a in soup.find_all("a", {"class": SEARCH_RESULT_CLASSES[scope]})
+        ]
+
+    def article_detail(self, content: bytes) -> dict:
+        article_data = {}
+        soup1 = BeautifulSoup(content, "html.parser")
+        if title_tag := soup1.find("h1", {"class": "header-title"}):
+            article_data['title'] = title_tag.text.strip()
+        if author_info := soup1.find("div", {"class": "author-info"}):
+            article_data['date'] = author_info.text.split(" on ")[-1].strip()
+        description_text = ""
+        if body_content := soup1.find("div", {"class": "body user-generated-content"}):
+            paragraphs = body_content.find_all('p')
+            description_text = "\n".join([p.text.strip() for p in paragraphs])
+        article_data['description'] = description_text
+        return article_data
+
+    def case_results(self, content: bytes) -> list:
+        soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("a"))
+        results = []
+        for i in soup.find_all("a", {"class": "search-result search-result-case"}):
+            result = {'href': i.get("href")}
+            if tt := i.find("h4", {"class": "search-result-title-text"}):
+                result['title'] = tt.text.strip()
+            if it := i.find("img", {"class": "media-object centered-image"}):
+                result['image_url'] = it.get("src")
+            results.append(result)
+        return results
+
+    def case_detail(self, content: bytes, study_images: bool = False) -> dict:
+        local_data = {}
+        soup_case = BeautifulSoup(content, "html.parser")
+
+        if pres := soup_case.find("div", {"id": "case-patient-presentation"}):
+            if p_tag := pres.find("p"):
+                local_data['presentation'] = p_tag.text.strip()
+
+        p_data_list = [d.text.strip() for d in soup_case.select("div.case-section div.data-item")]
+        local_data['patient_data'] = " ".join(p_data_list)
+
+        if bs := soup_case.find("div", {"class": "body sub-section"}):
+            case_parts = bs.text.strip().split("Case Discussion")
+            local_data["case_discussion"] = case_parts[-1].strip()
+
+        image_findings_list = [p.text.strip() for p in soup_case.select("div.study-findings p")]
+        local_data['image_findings'] = " ".join(image_findings_list)
+
+        if study_images:
+            local_data['study_images'] = _image_sources(soup_case.select("div.case-section.study img"))
+        return local_data
+
+
+def _image_sources(images) -> list:
+    """`src` (or lazy-loading `data-src`) of each study image, in document order and without repeats."""
+    return list(dict.fromkeys(src for img in images if (src := img.get("data-src") or img.get("src"))))
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlExtractor:
+    """
+    Fast extractor: parses with libxml2 and pulls out only the nodes the scrapers
+    need with precompiled XPath queries, mirroring the BeautifulSoup lookups
+    (first match for find, document order for select) so records are identical.
+    """
+
+    name = "lxml"
+
+    # Text as BeautifulSoup's .text sees it: script/style/template contents are not text.
+    _text_nodes = ".//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]"
+
+    def __init__(self):
+        xpath = lxml.etree.XPath
+        self._article_links = xpath('//a[normalize-space(@class)="search-result search-result-article"]')
+        self._case_links = xpath('//a[normalize-space(@class)="search-result search-result-case"]')
+        self._case_title = xpath(f'.//h4[{_has_class("search-result-title-text")}]')
+        self._case_image = xpath('.//img[normalize-space(@class)="media-object centered-image"]')
+        self._header_title = xpath(f'//h1[{_has_class("header-title")}]')
+        self._author_info = xpath(f'//div[{_has_class("author-info")}]')
+        self._article_body = xpath('//div[normalize-space(@class)="body user-generated-content"]')
+        self._presentation = xpath('//div[@id="case-patient-presentation"]')
+        self._data_items = xpath(f'//div[{_has_class("case-section")}]//div[{_has_class("data-item")}]')
+        self._case_body = xpath('//div[normalize-space(@class)="body sub-section"]')
+        self._findings = xpath(f'//div[{_has_class("study-findings")}]//p')
+        self._study_images = xpath(f'//div[{_has_class("case-section")} and {_has_class("study")}]//img')
+        self._paragraphs = xpath('.//p')
+        self._text = xpath(self._text_nodes)
+
+    def _parse(self, content: bytes):
+        # Decode the same way BeautifulSoup does so non-ASCII text matches exactly.
+        markup = UnicodeDammit(content, is_html=True).unicode_markup
+        try:
+            return lxml.html.document_fromstring(markup)
+        except (ParserError, ValueError):
+            return None
+
+    def _text_of(self, element) -> str:
+        return "".join(self._text(element))
+
+    def article_links(self, content: bytes) -> list:
+        root = self._parse(content)
+        if root is None:
+            return []
+        return [a.get("href") for a in self._article_links(root)]
+
+    def search_entries(self, content: bytes, scope: str) -> list:
+        root = self._parse(content)
+        if root is None:
+            return []
+        links = self._article_links if scope == "articles" else self._case_links
+        return [{'href': a.get("href"), 'fingerprint': _fingerprint(a.get("href"), self._text_of(a))} for a in links(root)]
+
+    def article_detail(self, content: bytes) -> dict:
+        article_data = {}
+        root = self._parse(content)
+        if root is None:
+            return {'description': ""}
+        if title_tags := self._header_title(root):
+            article_data['title'] = self._text_of(title_tags[0]).strip()
+        if author_info := self._author_info(root):
+            article_data['date'] = self._text_of(author_info[0]).split(" on ")[-1].strip()
+        description_text = ""
+        if body_content := self._article_body(root):
+            description_text = "\n".join([self._text_of(p).strip() for p in self._paragraphs(body_content[0])])
+        article_data['description'] = description_text
+        return article_data
+
+    def case_results(self, content: bytes) -> list:
+        root = self._parse(content)
+        if root is None:
+            return []
+        results = []
+        for i in self._case_links(root):
+            result = {'href': i.get("href")}
+            if tt := self._case_title(i):
+                result['title'] = self._text_of(tt[0]).strip()
+            if it := self._case_image(i):
+                result['image_url'] = it[0].get("src")
+            results.append(result)
+        return results
+
+    def case_detail(self, content: bytes, study_images: bool = False) -> dict:
+        local_data = {}
+        root = self._parse(content)
+        if root is None:
+            return {'patient_data': "", 'image_findings': "", **({'study_images': []} if study_images else {})}
+
+        if pres := self._presentation(root):
+            if p_tags := self._paragraphs(pres[0]):
+                local_data['presentation'] = self._text_of(p_tags[0]).strip()
+
+        local_data['patient_data'] = " ".join(self._text_of(d).strip() for d in self._data_items(root))
+
+        if bs := self._case_body(root):
+            case_parts = self._text_of(bs[0]).strip().split("Case Discussion")
+            local_data["case_discussion"] = case_parts[-1].strip()
+
+        local_data['image_findings'] = " ".join(self._text_of(p).strip() for p in self._findings(root))
+
+        if study_images:
+            local_data['study_images'] = _image_sources(self._study_images(root))
+        return local_data
+
+
+BACKENDS = {SoupExtractor.name: SoupExtractor}
+if lxml is not None:
+    BACKENDS[LxmlExtractor.name] = LxmlExtractor
+
+
+def get_extractor(name: str = None):
+    """
+    Returns the extractor named by `name` or SCRAPER_PARSER, defaulting to lxml
+    when it is installed and falling back to html.parser otherwise.
+    """
+    name = name or os.environ.get("SCRAPER_PARSER") or ("lxml" if lxml is not None else "html.parser")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable parser backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,144 @@
+# fetcher.py
+
+import os
+import asyncio
+import contextlib
+import httpx
+from cache import get_default_cache
+from ratelimit import RateLimiter, RETRYABLE_STATUSES, get_rate_limiter, parse_retry_after
+from metrics import registry, phase
+from storage import run_in_thread
+
+# Site being scraped; point it at a local stand-in for benchmarks.
+ORIGIN = os.environ.get("RADIOPAEDIA_ORIGIN", "https://radiopaedia.org").rstrip("/")
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Politeness defaults, overridable per deployment through the environment.
+# Request rates and retry behaviour are configured in ratelimit.py.
+MAX_CONCURRENCY = int(os.environ.get("SCRAPER_MAX_CONCURRENCY", "8"))
+REQUEST_TIMEOUT = float(os.environ.get("SCRAPER_TIMEOUT", "25"))
+
+# Loading the CA bundle takes tens of milliseconds, so build it once rather
+# than on the event loop for every client.
+SSL_CONTEXT = httpx.create_ssl_context()
+
+
+class FetchEngine:
+    """
+    Async HTTP client shared by the scrapers. Requests run concurrently up to
+    `max_concurrency`, while the process-wide rate limiter keeps the request
+    rate polite no matter how many are in flight, backing off when the origin
+    throttles and retrying with jittered exponential delays. Response cache
+    reads and writes hit SQLite, so they go through `run_blocking` (the
+    loop's default executor unless given) rather than running on the loop.
+    """
+
+    def __init__(self, max_concurrency: int = None, timeout: float = None, cache=None, limiter: RateLimiter = None, transport=None,
+                 run_blocking=None):
+        self.max_concurrency = max_concurrency or MAX_CONCURRENCY
+        self.timeout = timeout if timeout is not None else REQUEST_TIMEOUT
+        self.cache = cache if cache is not None else get_default_cache()
+        self.limiter = limiter if limiter is not None else get_rate_limiter()
+        self.transport = transport
+        self.run_blocking = run_blocking or run_in_thread
+        self._client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        self._client = httpx.AsyncClient(headers=HEADERS, timeout=self.timeout, limits=limits, verify=SSL_CONTEXT,
+                                         follow_redirects=True, transport=self.transport)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+
+    async def _send(self, url: str, headers: dict = None, stream: bool = False) -> httpx.Response:
+        """
+        Sends a GET once the limiter allows it. Throttled (429/503), failed (5xx)
+        and timed-out attempts slow the host down and are retried per the
+        limiter's retry policy, waiting out Retry-After when the origin sends
+        one; the last response is returned, or the last transport error raised,
+        when retries run out.
+        """
+        retry = self.limiter.retry
+        attempt = 1
+        while True:
+            async with self._semaphore:
+                with phase("rate_limit_wait"):
+                    await self.limiter.acquire(url)
+                try:
+                    response = await self._client.send(self._client.build_request("GET", url, headers=headers), stream=stream)
+                except httpx.TransportError:
+                    registry.inc("scraper_requests_total", status="error")
+                    self.limiter.on_throttle(url)
+                    if not retry.should_retry(attempt):
+                        raise
+                    retry_after = None
+                else:
+                    registry.inc("scraper_requests_total", status=response.status_code)
+                    if response.status_code == 429:
+                        registry.inc("scraper_throttled_total")
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        self.limiter.on_success(url)
+                        return response
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    self.limiter.on_throttle(url, retry_after)
+                    if not retry.should_retry(attempt):
+                        return response
+                    await response.aclose()
+            registry.inc("scraper_retries_total")
+            with phase("backoff"):
+                await asyncio.sleep(retry.delay(attempt, retry_after))
+            attempt += 1
+
+    async def get(self, url: str, revalidate: bool = False) -> httpx.Response:
+        """
+        Fetches `url`, retrying throttled and failed attempts, and raises on HTTP errors.
+        Fresh cached responses are returned without touching the network; stale
+        ones, or any cached one when `revalidate` is set, are revalidated with a
+        conditional request.
+        """
+        cached = await self.run_blocking(self.cache.lookup, url) if self.cache else None
+        if cached is not None and cached.fresh and not revalidate:
+            self.cache.hits += 1
+            registry.inc("scraper_cache_total", result="hit")
+            return cached.to_response()
+        headers = cached.validators if cached is not None else None
+        response = await self._send(url, headers)
+        if response.status_code == 304 and cached is not None:
+            self.cache.revalidated += 1
+            registry.inc("scraper_cache_total", result="revalidated")
+            await self.run_blocking(self.cache.refresh, url)
+            return cached.to_response()
+        response.raise_for_status()
+        registry.inc("scraper_bytes_received_total", len(response.content))
+        if self.cache:
+            self.cache.misses += 1
+            registry.inc("scraper_cache_total", result="miss")
+            await self.run_blocking(self.cache.store, url, response)
+        return response
+
+    @contextlib.asynccontextmanager
+    async def stream(self, url: str):
+        """
+        Opens `url` for streaming (bypassing the response cache) and yields the
+        response once its headers arrive; the body is read with `aiter_bytes`.
+        Retries like `get` and raises on HTTP errors.
+        """
+        response = await self._send(url, stream=True)
+        try:
+            response.raise_for_status()
+            yield response
+        finally:
+            await response.aclose()
+
+    async def get_many(self, urls: list) -> list:
+        """Fetches all `urls` concurrently; failed fetches come back as the exception raised."""
+        return await asyncio.gather(*(self.get(url) for url in urls), return_exceptions=True)
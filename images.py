@@ -0,0 +1,189 @@
+# images.py
+
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import contextlib
+import hashlib
+import threading
+from urllib.parse import urlsplit
+from fetcher import FetchEngine
+from metrics import registry, phase
+from storage import open_database
+
+IMAGE_STORE_DIR = os.environ.get("SCRAPER_IMAGE_STORE", os.path.join("downloaded_images", ".store"))
+IMAGE_WORKERS = int(os.environ.get("SCRAPER_IMAGE_WORKERS", "4"))
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageIndex:
+    """Maps image URLs to the content-addressed file already holding their bytes."""
+
+    def __init__(self, store_dir: str = IMAGE_STORE_DIR):
+        os.makedirs(store_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = open_database(os.path.join(store_dir, "index.sqlite"))
+        self._db.execute("CREATE TABLE IF NOT EXISTS images (url TEXT PRIMARY KEY, blob TEXT, size INTEGER, stored_at REAL)")
+
+    def lookup(self, url: str):
+        with self._lock:
+            row = self._db.execute("SELECT blob FROM images WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, url: str, blob: str, size: int):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?)", (url, blob, size, time.time()))
+
+
+_default_index = None
+
+
+def get_image_index():
+    global _default_index
+    if _default_index is None:
+        _default_index = ImageIndex()
+    return _default_index
+
+
+def _discard(path: str):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def _link(source: str, dest: str):
+    """Hard-links `source` to `dest`, copying instead where hard links aren't possible."""
+    if os.path.exists(dest):
+        os.remove(dest)
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copyfile(source, dest)
+
+
+class ImagePipeline:
+    """
+    Downloads images on a bounded pool of workers, streaming each body to disk
+    in chunks while hashing it. Files are stored once under their SHA-256 in
+    the image store and hard-linked to the requested paths, and URLs the store
+    already holds are linked without being fetched again.
+
+    Use as an async context manager; leaving it waits for queued downloads and
+    writes the run's counters into `stats`.
+    """
+
+    def __init__(self, run_blocking, workers: int = IMAGE_WORKERS, store_dir: str = IMAGE_STORE_DIR, stats: dict = None):
+        self.run_blocking = run_blocking
+        self.workers = workers
+        self.store_dir = store_dir
+        self.stats = stats if stats is not None else {}
+        self.index = get_image_index() if store_dir == IMAGE_STORE_DIR else ImageIndex(store_dir)
+        self.downloaded = 0
+        self.deduplicated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+        self._engine = FetchEngine(max_concurrency=workers, cache=False)
+        self._queue = None
+        self._tasks = []
+        self._started_at = None
+
+    async def __aenter__(self):
+        os.makedirs(os.path.join(self.store_dir, "tmp"), exist_ok=True)
+        await self._engine.__aenter__()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._started_at = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type, *exc_info):
+        try:
+            if exc_type is None:
+                await self._queue.join()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self._engine.__aexit__(exc_type, *exc_info)
+            elapsed = time.perf_counter() - self._started_at
+            self.stats.update({
+                "downloaded": self.downloaded,
+                "deduplicated": self.deduplicated,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "bytes_downloaded": self.bytes_downloaded,
+                "seconds": round(elapsed, 3),
+                "bytes_per_sec": round(self.bytes_downloaded / elapsed) if elapsed else 0,
+            })
+
+    def submit(self, url: str, dest_path: str):
+        """Queues `url` to be saved at `dest_path`; returns immediately."""
+        self._queue.put_nowait((url, dest_path))
+
+    async def _worker(self):
+        while True:
+            url, dest_path = await self._queue.get()
+            try:
+                await self._save(url, dest_path)
+            except Exception:
+                # Any failure only loses this image; a worker that died would
+                # leave the queue unjoinable and the scrape waiting forever.
+                self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    async def _save(self, url: str, dest_path: str):
+        # Index lookups and file moves touch the shared SQLite index and the
+        # disk, so they run through `run_blocking` like the chunk writes.
+        if await self.run_blocking(self._link_stored, url, dest_path):
+            self.skipped += 1
+            return
+
+        tmp_path = os.path.join(self.store_dir, "tmp", uuid.uuid4().hex)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with phase("image_download"):
+                async with self._engine.stream(url) as response:
+                    f = await self.run_blocking(open, tmp_path, 'wb')
+                    try:
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            hasher.update(chunk)
+                            size += len(chunk)
+                            await self.run_blocking(f.write, chunk)
+                    finally:
+                        await self.run_blocking(f.close)
+        except BaseException:
+            await self.run_blocking(_discard, tmp_path)
+            raise
+
+        digest = hasher.hexdigest()
+        extension = os.path.splitext(urlsplit(url).path)[1].lower() or ".jpg"
+        blob = os.path.join(digest[:2], digest + extension)
+        if await self.run_blocking(self._store, tmp_path, url, blob, size, dest_path):
+            self.deduplicated += 1
+        self.downloaded += 1
+        self.bytes_downloaded += size
+        registry.inc("scraper_bytes_received_total", size)
+
+    def _link_stored(self, url: str, dest_path: str) -> bool:
+        """Links `dest_path` to the stored copy of `url`; False if the store doesn't hold it."""
+        blob = self.index.lookup(url)
+        if not blob or not os.path.exists(os.path.join(self.store_dir, blob)):
+            return False
+        _link(os.path.join(self.store_dir, blob), dest_path)
+        return True
+
+    def _store(self, tmp_path: str, url: str, blob: str, size: int, dest_path: str) -> bool:
+        """Moves a download into the store, indexes it and links `dest_path`; True if the bytes were already stored."""
+        blob_path = os.path.join(self.store_dir, blob)
+        stored = os.path.exists(blob_path)
+        if stored:
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(tmp_path, blob_path)
+        self.index.record(url, blob, size)
+        _link(blob_path, dest_path)
+        return stored
@@ -0,0 +1,292 @@
+# jobs.py
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+from enum import Enum
+from results import ResultStore, get_result_store
+from storage import open_database, run_in_thread
+
+JOB_WORKERS = int(os.environ.get("SCRAPER_JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = float(os.environ.get("SCRAPER_JOB_RETENTION", "3600"))
+# Shared by every server worker process; empty keeps jobs in this process only.
+JOB_STORE_PATH = os.environ.get("SCRAPER_JOB_STORE_PATH", "jobs.sqlite")
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class Job:
+    def __init__(self, key: tuple, pages: int, filename_base: str, image_save_info: dict):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = JobStatus.queued
+        self.pages_total = pages
+        self.pages_done = {}
+        self.filename_base = filename_base
+        self.image_save_info = image_save_info
+        self.result = None
+        self.result_id = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.subscribers = 1
+        self.pid = os.getpid()
+
+    @property
+    def in_flight(self) -> bool:
+        return self.status in (JobStatus.queued, JobStatus.running)
+
+    def page_done(self, page: int, records: int):
+        self.pages_done[page] = records
+
+    def state(self) -> dict:
+        return {
+            "status": self.status.value,
+            "pages_total": self.pages_total,
+            "pages_done": self.pages_done,
+            "filename_base": self.filename_base,
+            "image_save_info": self.image_save_info,
+            "result_id": self.result_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_state(cls, job_id: str, key: tuple, pid: int, subscribers: int, state: dict):
+        job = cls(key, state["pages_total"], state["filename_base"], state["image_save_info"])
+        job.id = job_id
+        job.pid = pid
+        job.subscribers = subscribers
+        job.status = JobStatus(state["status"])
+        job.pages_done = {int(pg): n for pg, n in state["pages_done"].items()}
+        job.result_id = state["result_id"]
+        job.error = state["error"]
+        job.created_at, job.started_at, job.finished_at = state["created_at"], state["started_at"], state["finished_at"]
+        return job
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "pages_total": self.pages_total,
+            "pages_done": len(self.pages_done),
+            "records_per_page": {f"page_{pg}": n for pg, n in sorted(self.pages_done.items())},
+            "subscribers": self.subscribers,
+            "result_id": self.result_id,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """
+    SQLite copy of every job's progress. When the API runs as several worker
+    processes, a job is scraped by the worker that accepted it but can be
+    polled, deduplicated and (through its stored result) downloaded through
+    any of them.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self._lock = threading.Lock()
+        self._db = open_database(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, key TEXT, pid INTEGER, status TEXT, subscribers INTEGER,"
+            " state TEXT, updated_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)")
+
+    def save(self, job: Job):
+        """Writes the job's state; subscriber counts are kept by `subscribe`."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, key, pid, status, subscribers, state, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET"
+                " status = excluded.status, state = excluded.state, updated_at = excluded.updated_at",
+                (job.id, json.dumps(job.key), job.pid, job.status.value, job.subscribers, json.dumps(job.state()), time.time()),
+            )
+
+    def subscribe(self, job_id: str):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET subscribers = subscribers + 1 WHERE id = ?", (job_id,))
+
+    def _job(self, row) -> Job:
+        job_id, key, pid, subscribers, state = row
+        job = Job.from_state(job_id, tuple(json.loads(key)), pid, subscribers, json.loads(state))
+        if job.in_flight and pid != os.getpid() and not _alive(pid):
+            # The worker process scraping it is gone; the job will never finish.
+            job.status = JobStatus.failed
+            job.error = "The server worker running this job exited."
+            job.finished_at = job.finished_at or time.time()
+        return job
+
+    def load(self, job_id: str):
+        with self._lock:
+            row = self._db.execute("SELECT id, key, pid, subscribers, state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def find_in_flight(self, key: tuple):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, key, pid, subscribers, state FROM jobs WHERE key = ? AND status IN (?, ?)",
+                (json.dumps(key), JobStatus.queued.value, JobStatus.running.value),
+            ).fetchall()
+        jobs = [job for job in map(self._job, rows) if job.in_flight]
+        return jobs[0] if jobs else None
+
+    def prune(self, cutoff: float):
+        """
+        Deletes jobs last updated before `cutoff`. Queued and running jobs are
+        kept however old they are, unless the process running them has exited.
+        """
+        in_flight = (JobStatus.queued.value, JobStatus.running.value)
+        with self._lock:
+            stale = self._db.execute(
+                "SELECT id, pid FROM jobs WHERE updated_at < ? AND status IN (?, ?)", (cutoff, *in_flight)
+            ).fetchall()
+            orphaned = [(job_id,) for job_id, pid in stale if pid != os.getpid() and not _alive(pid)]
+            self._db.execute("DELETE FROM jobs WHERE updated_at < ? AND status NOT IN (?, ?)", (cutoff, *in_flight))
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", orphaned)
+
+
+class JobManager:
+    """
+    Runs scrape jobs in the background on a bounded pool of workers. Submitting a
+    job whose key matches one that is still queued or running returns that job
+    instead of starting a second, identical scrape. With a `store`, jobs run by
+    other server processes are visible too; with `results`, finished results
+    are moved into the result store and referenced by `result_id` instead of
+    being held in memory.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, retention: float = JOB_RETENTION_SECONDS, store: JobStore = None, results: ResultStore = None,
+                 run_blocking=None):
+        self.workers = workers
+        self.retention = retention
+        self.store = store
+        self.results = results
+        # The job store is shared SQLite, so its calls run off the event loop.
+        self.run_blocking = run_blocking or run_in_thread
+        self._jobs = {}
+        self._in_flight = {}
+        self._semaphore = None
+        self._tasks = set()
+
+    async def get(self, job_id: str):
+        """Returns the job, from this process or (with a store) from whichever process ran it."""
+        job = self._jobs.get(job_id)
+        if self.store is None:
+            return job
+        stored = await self.run_blocking(self.store.load, job_id)
+        if job is None:
+            return stored
+        if stored is not None:
+            job.subscribers = stored.subscribers  # includes subscribers that came in through other processes
+        return job
+
+    def _local_in_flight(self, key: tuple):
+        job = self._in_flight.get(key)
+        return job if job is not None and job.in_flight else None
+
+    async def find_in_flight(self, key: tuple):
+        if job := self._local_in_flight(key):
+            return job
+        return await self.run_blocking(self.store.find_in_flight, key) if self.store is not None else None
+
+    async def subscribe(self, job: Job):
+        job.subscribers += 1
+        if self.store is not None:
+            await self.run_blocking(self.store.subscribe, job.id)
+
+    async def _save(self, job: Job):
+        if self.store is not None:
+            await self.run_blocking(self.store.save, job)
+
+    async def submit(self, key: tuple, run, pages: int, filename_base: str, image_save_info: dict) -> Job:
+        """
+        Queues `run(progress)` as a job. `run` is an async callable that receives
+        the job's async per-page progress callback and returns the scraped data.
+        """
+        await self._prune()
+        # Checked again after the store lookup, which another submit may have overlapped.
+        if (job := await self.find_in_flight(key)) or (job := self._local_in_flight(key)):
+            await self.subscribe(job)
+            return job
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        job = Job(key, pages, filename_base, image_save_info)
+        self._jobs[job.id] = job
+        self._in_flight[key] = job
+        await self._save(job)
+        # The loop only keeps weak references to tasks; hold on to each until it finishes.
+        task = asyncio.get_running_loop().create_task(self._run(job, run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, run):
+        async def progress(page: int, records: int):
+            job.page_done(page, records)
+            await self._save(job)
+
+        async with self._semaphore:
+            job.status = JobStatus.running
+            job.started_at = time.time()
+            await self._save(job)
+            try:
+                job.result = await run(progress)
+                if self.results is not None:
+                    meta = {"filename_base": job.filename_base, "image_save_info": job.image_save_info}
+                    job.result_id = await self.run_blocking(self.results.put, job.result, meta)
+                    job.result = None
+                job.status = JobStatus.succeeded
+            except Exception as e:
+                job.error = str(e)
+                job.status = JobStatus.failed
+            finally:
+                job.finished_at = time.time()
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+                await self._save(job)
+
+    async def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items() if not job.in_flight and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self.store is not None:
+            await self.run_blocking(self.store.prune, cutoff)
+
+
+_default_manager = None
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job manager, created on first use so importing the API creates no store files."""
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = JobManager(store=JobStore() if JOB_STORE_PATH else None, results=get_result_store())
+    return _default_manager
@@ -0,0 +1,238 @@
+# metrics.py
+
+import os
+import time
+import cProfile
+import threading
+import contextlib
+import contextvars
+from datetime import datetime
+from urllib.parse import parse_qs
+
+try:
+    import pyinstrument
+except ImportError:  # pyinstrument is optional; cProfile is the fallback profiler
+    pyinstrument = None
+
+# Per-request profiling is opt-in: anyone who can reach the API could
+# otherwise slow it down and fill the disk with profiles.
+PROFILING_ENABLED = os.environ.get("SCRAPER_PROFILING", "0") not in ("", "0", "false")
+PROFILE_DIR = os.environ.get("SCRAPER_PROFILE_DIR", "profiles")
+# Only the newest profiles are kept.
+PROFILE_KEEP = int(os.environ.get("SCRAPER_PROFILE_KEEP", "50"))
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "scraper_requests_total": ("counter", "Outgoing HTTP requests by status code."),
+    "scraper_throttled_total": ("counter", "Outgoing requests answered with 429."),
+    "scraper_retries_total": ("counter", "Outgoing requests retried after a throttle, 5xx or transport error."),
+    "scraper_cache_total": ("counter", "Response cache lookups by result."),
+    "scraper_bytes_received_total": ("counter", "Response body bytes received from the origin."),
+    "scraper_dedup_total": ("counter", "Detail records reused from the dedup store or scraped and stored."),
+    "scraper_phase_seconds": ("histogram", "Time spent per scrape phase (per call)."),
+    "api_requests_total": ("counter", "API requests served by route and status code."),
+    "api_request_seconds": ("histogram", "API response time until the last body byte, by route."),
+}
+
+
+def _label_key(labels: dict) -> tuple:
+    # Values are kept as strings so keys stay sortable when one label mixes
+    # types, e.g. an HTTP status code and "error".
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Registry:
+    """Process-wide counters and histograms, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = [[0] * len(BUCKETS), 0, 0.0]
+            histogram = self._histograms[key]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def render(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(b), n, total) for key, (b, n, total) in self._histograms.items()}
+        lines = []
+        for name, (kind, text) in HELP.items():
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value:.17g}")
+            for (metric, labels), (buckets, count, total) in sorted(histograms.items()):
+                if metric == name:
+                    for bound, cumulative in zip(BUCKETS, buckets):
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    """Cumulative time and call count per phase for one API request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases = {}
+
+    def add(self, phase_name: str, seconds: float):
+        with self._lock:
+            total, calls = self.phases.get(phase_name, (0.0, 0))
+            self.phases[phase_name] = (total + seconds, calls + 1)
+
+    def server_timing(self, total: float) -> str:
+        """
+        Server-Timing header value. Phases run concurrently, so a phase's
+        duration is the sum over its calls and can exceed the total.
+        """
+        with self._lock:
+            phases = sorted(self.phases.items())
+        entries = [f'{name};dur={seconds * 1000:.1f};desc="{calls} calls"' for name, (seconds, calls) in phases]
+        return ", ".join(entries + [f"total;dur={total * 1000:.1f}"])
+
+
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """
+    Times the enclosed block into the `scraper_phase_seconds` histogram and the
+    current request's Server-Timing. Works in coroutines and, via the copied
+    context `_run_blocking` runs them in, in worker threads.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("scraper_phase_seconds", elapsed, phase=name)
+        if (timings := current_timings.get()) is not None:
+            timings.add(name, elapsed)
+
+
+class _RequestProfiler:
+    """Profiles one request with pyinstrument when installed, otherwise cProfile."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._profiler = None
+
+    def start(self) -> bool:
+        # cProfile watches the whole event-loop thread, so only one request is
+        # profiled at a time.
+        if not self._lock.acquire(blocking=False):
+            return False
+        if pyinstrument is not None:
+            self._profiler = pyinstrument.Profiler(async_mode="enabled")
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return True
+
+    def stop(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if pyinstrument is not None:
+                self._profiler.stop()
+                with open(self.path, "w") as f:
+                    f.write(self._profiler.output_html())
+            else:
+                self._profiler.disable()
+                self._profiler.dump_stats(self.path)
+            self._prune()
+        finally:
+            self._lock.release()
+
+    def _prune(self):
+        # File names start with their timestamp, so they sort oldest first.
+        directory = os.path.dirname(self.path)
+        files = sorted(entry.name for entry in os.scandir(directory) if entry.is_file())
+        for name in files[:-PROFILE_KEEP or None]:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(directory, name))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that gives every HTTP request its own phase timings, adds
+    them as a Server-Timing header, counts the request by route and status,
+    and, when SCRAPER_PROFILING is on, profiles it if the query string has
+    `profile=true` (the profile is written under PROFILE_DIR and its file name
+    sent as X-Profile-Path).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+        profiler = None
+        query = parse_qs(scope.get("query_string", b"").decode())
+        if PROFILING_ENABLED and query.get("profile", [""])[0].lower() in ("1", "true"):
+            extension = "html" if pyinstrument is not None else "prof"
+            name = scope["path"].strip("/").replace("/", "_") or "root"
+            path = os.path.join(PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{name}.{extension}")
+            profiler = _RequestProfiler(path)
+            if not profiler.start():
+                profiler = None
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(time.perf_counter() - start).encode()))
+                if profiler is not None:
+                    headers.append((b"x-profile-path", os.path.basename(profiler.path).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            registry.inc("api_requests_total", route=route_path, status=status["code"])
+            registry.observe("api_request_seconds", time.perf_counter() - start, route=route_path)
+            current_timings.reset(token)
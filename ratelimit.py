@@ -0,0 +1,275 @@
+# ratelimit.py
+
+import os
+import time
+import random
+import asyncio
+import multiprocessing
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Politeness and backoff settings, overridable per deployment through the environment.
+# The defaults keep the original scraper's cadence (one request, then a 1-2 s
+# pause: about 0.6 requests/sec); faster rates are opt-in.
+HOST_RATE = float(os.environ.get("SCRAPER_HOST_RATE", "0.6"))           # starting requests/sec per host (0 = unlimited)
+HOST_MIN_RATE = float(os.environ.get("SCRAPER_HOST_MIN_RATE", "0.25"))  # floor the controller backs off to
+HOST_MAX_RATE = float(os.environ.get("SCRAPER_HOST_MAX_RATE", "0.6"))   # ceiling the controller speeds up to
+HOST_BURST = int(os.environ.get("SCRAPER_HOST_BURST", "1"))             # requests allowed back to back
+GLOBAL_RATE = float(os.environ.get("SCRAPER_GLOBAL_RATE", "0.6"))       # requests/sec across all hosts (0 = unlimited)
+AIMD_INCREASE = float(os.environ.get("SCRAPER_AIMD_INCREASE", "0.5"))   # req/s gained per second of healthy traffic
+AIMD_DECREASE = float(os.environ.get("SCRAPER_AIMD_DECREASE", "0.5"))   # rate multiplier on 429/5xx
+RETRY_ATTEMPTS = int(os.environ.get("SCRAPER_RETRY_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.environ.get("SCRAPER_RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.environ.get("SCRAPER_RETRY_MAX_DELAY", "30"))
+RETRY_BUDGET_RATIO = float(os.environ.get("SCRAPER_RETRY_BUDGET", "0.2"))  # retries allowed per request sent
+RETRY_BUDGET_RESERVE = float(os.environ.get("SCRAPER_RETRY_BUDGET_RESERVE", "10"))
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value: str):
+    """Seconds to wait from a Retry-After header given as delta-seconds or an HTTP date; None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket of `rate` tokens/sec holding up to `burst` tokens, implemented as
+    a virtual schedule so `acquire` only has to sleep until the caller's slot.
+    Reservations are made without awaiting, so one bucket can be shared by every
+    coroutine in the process, whichever event loop it runs on.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.burst = max(1, burst)
+        self._theoretical_arrival = 0.0
+        self._blocked_until = 0.0
+        self.set_rate(rate)
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float):
+        self._rate = rate
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+
+    def block_for(self, seconds: float):
+        """Hands out no tokens for the next `seconds` (used to honor Retry-After)."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def reserve(self) -> float:
+        """Claims the next token and returns how long the caller must wait for it."""
+        now = time.monotonic()
+        start = max(now, self._blocked_until)
+        if self._interval:
+            start = max(start, self._theoretical_arrival - (self.burst - 1) * self._interval)
+            self._theoretical_arrival = max(self._theoretical_arrival, start) + self._interval
+        return start - now
+
+    async def acquire(self):
+        if (wait := self.reserve()) > 0:
+            await asyncio.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose rate and schedule live in shared memory, so every process
+    started with it (e.g. crawler pool workers) draws from one budget and sees
+    the others' backoff. Relies on time.monotonic being system-wide, as it is
+    on Linux, macOS and Windows.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, context=None):
+        self.burst = max(1, burst)
+        context = context or multiprocessing.get_context()  # must match the context the processes are started with
+        self._state = context.Array("d", [rate, 0.0, 0.0])  # rate, theoretical arrival, blocked until
+
+    @property
+    def rate(self) -> float:
+        return self._state[0]
+
+    def set_rate(self, rate: float):
+        self._state[0] = rate
+
+    def block_for(self, seconds: float):
+        with self._state.get_lock():
+            self._state[2] = max(self._state[2], time.monotonic() + seconds)
+
+    def reserve(self) -> float:
+        with self._state.get_lock():
+            rate, theoretical_arrival, blocked_until = self._state[:]
+            now = time.monotonic()
+            start = max(now, blocked_until)
+            if rate > 0:
+                interval = 1.0 / rate
+                start = max(start, theoretical_arrival - (self.burst - 1) * interval)
+                self._state[1] = max(theoretical_arrival, start) + interval
+        return start - now
+
+
+class AimdController:
+    """
+    Additive-increase/multiplicative-decrease control of a bucket's rate: every
+    success nudges the rate up so it gains about `increase` req/s per second of
+    healthy traffic, and a throttling response cuts it by `decrease`, at most
+    once per cool-down so a burst of 429s from requests already in flight only
+    counts once.
+    """
+
+    def __init__(self, bucket: TokenBucket, min_rate: float = HOST_MIN_RATE, max_rate: float = HOST_MAX_RATE,
+                 increase: float = AIMD_INCREASE, decrease: float = AIMD_DECREASE):
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.successes = 0
+        self.throttles = 0
+        self._last_decrease = 0.0
+
+    def on_success(self):
+        self.successes += 1
+        rate = self.bucket.rate
+        if rate and self.increase:
+            self.bucket.set_rate(min(self.max_rate, rate + self.increase / rate))
+
+    def on_throttle(self, retry_after: float = None):
+        self.throttles += 1
+        if retry_after:
+            self.bucket.block_for(retry_after)
+        now = time.monotonic()
+        rate = self.bucket.rate
+        cool_down = max(1.0, 1.0 / rate) if rate else 1.0
+        if rate and now - self._last_decrease >= cool_down:
+            self._last_decrease = now
+            self.bucket.set_rate(max(self.min_rate, rate * self.decrease))
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of the requests sent: each request deposits `ratio`
+    tokens up to a balance of `reserve` and each retry spends one, so a failing
+    origin cannot turn every request into several.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, reserve: float = RETRY_BUDGET_RESERVE):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = reserve
+        self.exhausted = 0
+
+    def deposit(self):
+        self._balance = min(self.reserve, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self._balance >= 1:
+            self._balance -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+class RetryPolicy:
+    """Jittered exponential backoff ("full jitter") that defers to Retry-After when the origin sends one."""
+
+    def __init__(self, max_attempts: int = RETRY_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, budget: RetryBudget = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else RetryBudget()
+        self.retries = 0
+
+    def should_retry(self, attempt: int) -> bool:
+        """Whether a request that failed on its `attempt`-th try (1-based) may be sent again."""
+        if attempt >= self.max_attempts or not self.budget.withdraw():
+            return False
+        self.retries += 1
+        return True
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RateLimiter:
+    """
+    Request pacing shared by every FetchEngine in the process: a global token
+    bucket caps the total rate, and each host gets its own bucket steered by an
+    AIMD controller from the responses that host returns. Passing `host_bucket`
+    (and `global_bucket`) makes every host draw from that one bucket instead,
+    which is how several processes share a single budget.
+    """
+
+    def __init__(self, host_rate: float = HOST_RATE, global_rate: float = GLOBAL_RATE, burst: int = HOST_BURST,
+                 min_rate: float = HOST_MIN_RATE, max_rate: float = HOST_MAX_RATE,
+                 increase: float = AIMD_INCREASE, decrease: float = AIMD_DECREASE, retry: RetryPolicy = None,
+                 host_bucket: TokenBucket = None, global_bucket: TokenBucket = None):
+        self.host_rate = host_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, host_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.global_bucket = global_bucket if global_bucket is not None else TokenBucket(global_rate, burst)
+        self.retry = retry if retry is not None else RetryPolicy()
+        self._host_bucket = host_bucket
+        self._hosts = {}
+
+    def _controller(self, url: str) -> AimdController:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            bucket = self._host_bucket if self._host_bucket is not None else TokenBucket(self.host_rate, self.burst)
+            self._hosts[host] = AimdController(bucket, self.min_rate, self.max_rate, self.increase, self.decrease)
+        return self._hosts[host]
+
+    async def acquire(self, url: str):
+        self.retry.budget.deposit()
+        await self._controller(url).bucket.acquire()
+        await self.global_bucket.acquire()
+
+    def on_success(self, url: str):
+        self._controller(url).on_success()
+
+    def on_throttle(self, url: str, retry_after: float = None):
+        self._controller(url).on_throttle(retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "global_rate": self.global_bucket.rate,
+            "retries": self.retry.retries,
+            "retry_budget_exhausted": self.retry.budget.exhausted,
+            "hosts": {
+                host: {"rate": round(c.bucket.rate, 3), "successes": c.successes, "throttles": c.throttles}
+                for host, c in self._hosts.items()
+            },
+        }
+
+
+_default_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by every scrape running in this process."""
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = RateLimiter()
+    return _default_limiter
+
+
+def set_rate_limiter(limiter: RateLimiter):
+    """Replaces the process-wide limiter, e.g. with one built on shared buckets in a worker process."""
+    global _default_limiter
+    _default_limiter = limiter
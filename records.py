@@ -0,0 +1,124 @@
+# records.py
+
+import sys
+import json
+import uuid
+from collections.abc import Mapping
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is the fallback
+    orjson = None
+
+
+def record_id(url: str) -> str:
+    """
+    Stable ID of a case or article: a UUID derived from the slug path of its
+    URL (`cases/<slug>`), so it is the same on every scrape whatever the host,
+    query string or trailing slash.
+    """
+    path = urlsplit(url).path.strip("/").lower()
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"radiopaedia:{path}"))
+
+
+class Record(Mapping):
+    """
+    Base for scraped records: a slotted dataclass that reads like the dict it
+    replaces. Fields left as None count as absent, so `keys()`, `get()`,
+    iteration and the JSON form match the dicts previously built field by field.
+    `status` is "new" for a record harvested for the first time and "existing"
+    for one harvested before.
+    """
+
+    __slots__ = ()
+    _interned = ()
+
+    def __post_init__(self):
+        # Values such as patient data or revision dates repeat across
+        # thousands of records; interning keeps one copy of each.
+        for name in self._interned:
+            if (value := getattr(self, name)) is not None:
+                object.__setattr__(self, name, sys.intern(value))
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__ or (value := getattr(self, key)) is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (name for name in self.__slots__ if getattr(self, name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict:
+        return {name: value for name in self.__slots__ if (value := getattr(self, name)) is not None}
+
+    @classmethod
+    def from_fields(cls, fields: dict):
+        """Builds a record from extractor output, ignoring keys the record doesn't define."""
+        return cls(**{name: value for name, value in fields.items() if name in cls.__slots__})
+
+
+@dataclass(slots=True, eq=False)
+class Article(Record):
+    article_id: str
+    url: str
+    title: str = None
+    date: str = None
+    description: str = None
+    status: str = None
+
+    _interned = ("date",)
+
+
+@dataclass(slots=True, eq=False)
+class Case(Record):
+    patient_id: str
+    url: str
+    presentation: str = None
+    patient_data: str = None
+    case_discussion: str = None
+    image_findings: str = None
+    title: str = None
+    image_url: str = None
+    study_images: str = None
+    status: str = None
+
+    _interned = ("patient_data",)
+
+
+def _default(value):
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Serializes API content, records included, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def columns(data: dict) -> dict:
+    """
+    Flat, column-oriented layout of a `{"page_n": [...]}` result: one list per
+    field across all records plus a `page` column, with null where a record
+    lacks the field. Field names appear once instead of once per record.
+    """
+    names = {}
+    for records in data.values():
+        for record in records:
+            names.update(dict.fromkeys(record))
+    table = {"page": []}
+    table.update((name, []) for name in names)
+    for page_key, records in data.items():
+        page = int(page_key.replace('page_', ''))
+        for record in records:
+            table["page"].append(page)
+            for name in names:
+                table[name].append(record.get(name))
+    return table
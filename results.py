@@ -0,0 +1,139 @@
+# results.py
+
+import os
+import gzip
+import json
+import time
+import uuid
+import threading
+from exports import write_parquet
+from storage import open_database, lru_victims
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; results are then stored as gzipped column lists
+    pq = None
+
+RESULT_DIR = os.environ.get("SCRAPER_RESULT_DIR", "results")
+RESULT_TTL = float(os.environ.get("SCRAPER_RESULT_TTL", "86400"))
+RESULT_MAX_BYTES = int(float(os.environ.get("SCRAPER_RESULT_MAX_MB", "512")) * 1024 * 1024)
+
+
+def _write_columns(data: dict, path: str):
+    """Fallback layout: per page, one list of values per column."""
+    pages = {}
+    for page_key, records in data.items():
+        columns = list(dict.fromkeys(key for record in records for key in record))
+        pages[page_key] = {column: [record.get(column) for record in records] for column in columns}
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(pages, f)
+
+
+def _read_columns(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        pages = json.load(f)
+    data = {}
+    for page_key, columns in pages.items():
+        rows = zip(*columns.values()) if columns else ()
+        data[page_key] = [{k: v for k, v in zip(columns, row) if v is not None} for row in rows]
+    return data
+
+
+def _read_parquet(path: str, page_keys: list) -> dict:
+    data = {page_key: [] for page_key in page_keys}
+    for row in pq.read_table(path).to_pylist():
+        page = row.pop("page")
+        data[f"page_{page}"].append({k: v for k, v in row.items() if v is not None})
+    return data
+
+
+class ResultStore:
+    """
+    Finished scrape results kept on disk under a result ID, so they can be
+    viewed and exported again in any format without re-scraping. Results are
+    stored columnar (zstd Parquet when pyarrow is installed) with an SQLite
+    catalogue, and evicted once older than `ttl` or, least recently used
+    first, once they take up more than `max_bytes`. Missing fields come back
+    absent rather than null.
+    """
+
+    def __init__(self, directory: str = RESULT_DIR, ttl: float = RESULT_TTL, max_bytes: int = RESULT_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = open_database(os.path.join(directory, "results.sqlite"))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " id TEXT PRIMARY KEY, file TEXT, meta TEXT, records INTEGER, size INTEGER,"
+            " created_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+
+    def put(self, data: dict, meta: dict = None) -> str:
+        """Stores a `{"page_n": [...]}` result with JSON-able `meta` and returns its ID."""
+        result_id = uuid.uuid4().hex
+        file = result_id + (".parquet" if pq is not None else ".json.gz")
+        path = os.path.join(self.directory, file)
+        if pq is not None:
+            write_parquet(data, path)
+        else:
+            _write_columns(data, path)
+        meta = {**(meta or {}), "pages": list(data)}
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (result_id, file, json.dumps(meta), sum(len(records) for records in data.values()),
+                 os.path.getsize(path), now, now),
+            )
+            self._evict()
+        return result_id
+
+    def get(self, result_id: str):
+        """Returns `(data, meta)` for a stored result, or None if it is unknown or has been evicted."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file, meta FROM results WHERE id = ? AND created_at >= ?", (result_id, time.time() - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE results SET accessed_at = ? WHERE id = ?", (time.time(), result_id))
+        file, meta = row
+        meta = json.loads(meta)
+        path = os.path.join(self.directory, file)
+        try:
+            data = _read_parquet(path, meta["pages"]) if file.endswith(".parquet") else _read_columns(path)
+        except FileNotFoundError:  # evicted by another process in the meantime
+            return None
+        return data, meta
+
+    def _evict(self):
+        cutoff = time.time() - self.ttl
+        expired = self._db.execute("SELECT id, file FROM results WHERE created_at < ?", (cutoff,)).fetchall()
+        expired += lru_victims(self._db, "results", "id, file", self.max_bytes, "created_at >= ?", (cutoff,))
+        for result_id, file in expired:
+            self._db.execute("DELETE FROM results WHERE id = ?", (result_id,))
+            try:
+                os.remove(os.path.join(self.directory, file))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, records, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(records), 0), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {"results": entries, "records": records, "size_bytes": size, "max_bytes": self.max_bytes, "ttl_seconds": self.ttl}
+
+
+_default_store = None
+
+
+def get_result_store():
+    """Process-wide result store; None when SCRAPER_RESULT_DIR is empty."""
+    global _default_store
+    if _default_store is None and RESULT_DIR:
+        _default_store = ResultStore()
+    return _default_store
@@ -0,0 +1,129 @@
+# search_index.py
+
+import os
+import re
+import json
+import time
+import threading
+from storage import open_database
+
+SEARCH_INDEX_PATH = os.environ.get("SCRAPER_SEARCH_INDEX_PATH", "search_index.sqlite")
+
+# Indexed text fields, in bm25 weight order: a match in the title counts most.
+SEARCH_FIELDS = ("title", "description", "presentation", "image_findings", "case_discussion")
+FIELD_WEIGHTS = (10.0, 2.0, 2.0, 2.0, 1.0)
+LABEL_KINDS = ("section", "system")
+
+
+def match_expression(query: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches every whitespace-separated
+    term (as a phrase, so "article-1-3" keeps its word order), so user input can
+    never be a syntax error; a trailing `*` on a term keeps prefix matching.
+    """
+    phrases = []
+    for term in query.split():
+        if words := re.findall(r"\w+", term):
+            phrases.append(f'"{" ".join(words)}"' + ("*" if term.endswith("*") else ""))
+    return " ".join(phrases)
+
+
+class SearchIndex:
+    """
+    Full-text index of every scraped article and case. Records are stored as
+    JSON next to an FTS5 table over their text fields, and tagged with the
+    section/system filters they were scraped under so searches can be narrowed
+    to them.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH):
+        self._lock = threading.Lock()
+        self._db = open_database(path)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " id INTEGER PRIMARY KEY, url TEXT UNIQUE, scope TEXT, record TEXT, indexed_at REAL);"
+            "CREATE TABLE IF NOT EXISTS labels ("
+            " url TEXT, kind TEXT, value TEXT, PRIMARY KEY (kind, value, url));"
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5({', '.join(SEARCH_FIELDS)},"
+            " tokenize='porter unicode61');"
+        )
+
+    def add(self, scope: str, records: list, labels: dict = None):
+        """Indexes (or re-indexes) `records`, tagging each with the given `{kind: value}` labels."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for record in records:
+                    url = record.get('url')
+                    if not url:
+                        continue
+                    row = self._db.execute(
+                        "INSERT INTO records (url, scope, record, indexed_at) VALUES (?, ?, ?, ?)"
+                        " ON CONFLICT(url) DO UPDATE SET record = excluded.record, indexed_at = excluded.indexed_at"
+                        " RETURNING id",
+                        (url, scope, json.dumps(dict(record)), now),
+                    ).fetchone()
+                    self._db.execute("DELETE FROM documents WHERE rowid = ?", row)
+                    self._db.execute(
+                        f"INSERT INTO documents (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (?{', ?' * len(SEARCH_FIELDS)})",
+                        (row[0], *(record.get(field) or "" for field in SEARCH_FIELDS)),
+                    )
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO labels VALUES (?, ?, ?)",
+                        [(url, kind, value) for kind, value in (labels or {}).items() if value],
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def search(self, query: str, scope: str = None, section: str = None, system: str = None, page: int = 1, page_size: int = 20) -> dict:
+        """
+        Ranked (bm25) search over the indexed text. Returns the total number of
+        matches and one page of `{url, scope, score, snippet, record}` results.
+        """
+        expression = match_expression(query)
+        if not expression:
+            return {"total": 0, "results": []}
+        where, params = ["documents MATCH ?"], [expression]
+        if scope:
+            where.append("records.scope = ?")
+            params.append(scope)
+        for kind, value in (("section", section), ("system", system)):
+            if value:
+                where.append("records.url IN (SELECT url FROM labels WHERE kind = ? AND value = ?)")
+                params += [kind, value]
+        joined = f"FROM documents JOIN records ON records.id = documents.rowid WHERE {' AND '.join(where)}"
+        weights = ", ".join(str(w) for w in FIELD_WEIGHTS)
+        with self._lock:
+            total = self._db.execute(f"SELECT count(*) {joined}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT records.url, records.scope, bm25(documents, {weights}) AS score,"
+                f" snippet(documents, -1, '[', ']', '…', 16), records.record {joined}"
+                " ORDER BY score LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size],
+            ).fetchall()
+        return {
+            "total": total,
+            "results": [
+                {"url": url, "scope": scope, "score": round(-score, 4), "snippet": snippet, "record": json.loads(record)}
+                for url, scope, score, snippet, record in rows
+            ],
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT scope, count(*) FROM records GROUP BY scope").fetchall())
+        return {"documents": sum(counts.values()), "by_scope": counts}
+
+
+_default_index = None
+
+
+def get_search_index():
+    """Process-wide search index; None when SCRAPER_SEARCH_INDEX_PATH is empty."""
+    global _default_index
+    if _default_index is None and SEARCH_INDEX_PATH:
+        _default_index = SearchIndex()
+    return _default_index
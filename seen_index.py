@@ -0,0 +1,94 @@
+# seen_index.py
+
+import os
+import json
+import time
+import hashlib
+import threading
+from storage import open_database
+
+SEEN_INDEX_PATH = os.environ.get("SCRAPER_SEEN_INDEX_PATH", "seen_index.sqlite")
+
+
+def content_hash(record: dict, ignore: tuple = ("patient_id", "article_id", "status")) -> str:
+    """Stable hash of a scraped record, leaving out its ID and new/existing status, which say nothing about its content."""
+    stable = {key: value for key, value in record.items() if key not in ignore}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SeenIndex:
+    """
+    Persistent index of every article/case URL an incremental crawl has seen,
+    with the fingerprint of its search-result entry, its last edit date and the
+    hash of its scraped record, plus the order in which each feed listed its
+    entries on its last crawl.
+    """
+
+    def __init__(self, path: str = SEEN_INDEX_PATH):
+        self._lock = threading.Lock()
+        self._db = open_database(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " url TEXT PRIMARY KEY, scope TEXT, fingerprint TEXT, edit_date TEXT,"
+            " content_hash TEXT, first_seen REAL, last_seen REAL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS feeds (feed TEXT, url TEXT, rank INTEGER, PRIMARY KEY (feed, url))")
+
+    def lookup(self, urls: list) -> dict:
+        """Returns `{url: (fingerprint, content_hash)}` for the given URLs that are already indexed."""
+        if not urls:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT url, fingerprint, content_hash FROM items WHERE url IN ({','.join('?' * len(urls))})", urls
+            ).fetchall()
+        return {url: (fingerprint, digest) for url, fingerprint, digest in rows}
+
+    def record(self, scope: str, items: list):
+        """Stores `(url, fingerprint, content_hash, edit_date)` for each item in one transaction."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET"
+                    " fingerprint = excluded.fingerprint, edit_date = excluded.edit_date,"
+                    " content_hash = excluded.content_hash, last_seen = excluded.last_seen",
+                    [(url, scope, fingerprint, edit_date, digest, now, now) for url, fingerprint, digest, edit_date in items],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def ranks(self, feed: str) -> dict:
+        """Returns `{url: rank}` for the entries `feed` listed on its last crawl, 0 being the first."""
+        with self._lock:
+            return dict(self._db.execute("SELECT url, rank FROM feeds WHERE feed = ?", (feed,)).fetchall())
+
+    def set_ranks(self, feed: str, urls: list):
+        """Replaces the listing order remembered for `feed` with `urls`, in feed order."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM feeds WHERE feed = ?", (feed,))
+                self._db.executemany("INSERT OR IGNORE INTO feeds VALUES (?, ?, ?)", [(feed, url, rank) for rank, url in enumerate(urls)])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def touch(self, urls: list):
+        now = time.time()
+        with self._lock:
+            self._db.executemany("UPDATE items SET last_seen = ? WHERE url = ?", [(now, url) for url in urls])
+
+
+_default_index = None
+
+
+def get_seen_index():
+    global _default_index
+    if _default_index is None:
+        _default_index = SeenIndex()
+    return _default_index
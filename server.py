@@ -0,0 +1,107 @@
+# server.py
+
+"""
+Runs the API as its own server, separate from the Streamlit UI, with several
+worker processes so scrapes, parsing and exports spread over all cores:
+
+    python server.py --workers 4 --host 0.0.0.0 --port 8000
+
+Gunicorn with uvicorn workers is used when it is installed, otherwise uvicorn's
+own process manager. Point the UI at it with SCRAPER_API_URL. Each worker has
+its own rate limiter, so the configured request rates are split evenly between
+the workers to keep the total as polite as a single process.
+"""
+
+import os
+import sys
+import socket
+import argparse
+import threading
+import uvicorn
+
+API_HOST = os.environ.get("SCRAPER_API_HOST", "0.0.0.0")
+API_PORT = int(os.environ.get("SCRAPER_API_PORT", "8000"))
+API_WORKERS = int(os.environ.get("SCRAPER_API_WORKERS", str(os.cpu_count() or 1)))
+APP = "api_main:app"
+
+_embedded_lock = threading.Lock()
+_embedded_thread = None
+
+
+def _share_rate_limits(workers: int):
+    """Divides the per-process request rates between `workers` processes via the environment they inherit."""
+    import ratelimit
+    rates = {
+        "SCRAPER_HOST_RATE": ratelimit.HOST_RATE,
+        "SCRAPER_HOST_MIN_RATE": ratelimit.HOST_MIN_RATE,
+        "SCRAPER_HOST_MAX_RATE": ratelimit.HOST_MAX_RATE,
+        "SCRAPER_GLOBAL_RATE": ratelimit.GLOBAL_RATE,
+    }
+    for name, rate in rates.items():
+        os.environ[name] = str(rate / workers)  # 0 (unlimited) stays 0
+
+
+def _port_in_use(host: str, port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1" if host == "0.0.0.0" else host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def start_embedded(host: str = None, port: int = None) -> bool:
+    """
+    Serves the API from a daemon thread of the calling process, with a single
+    worker. Only the first call per process starts it, and none does if
+    something already listens on the port (e.g. a standalone server); returns
+    whether this call started it.
+    """
+    global _embedded_thread
+    host = host or API_HOST
+    port = port or API_PORT
+    with _embedded_lock:
+        if _embedded_thread is not None or _port_in_use(host, port):
+            return False
+        from api_main import app
+        server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        _embedded_thread = threading.Thread(target=server.run, name="embedded-api", daemon=True)
+        _embedded_thread.start()
+        return True
+
+
+def serve(host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS, backend: str = "auto"):
+    """Runs the API in the foreground with `workers` processes until interrupted."""
+    if workers > 1:
+        _share_rate_limits(workers)
+
+    if backend in ("auto", "gunicorn"):
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            if backend == "gunicorn":
+                raise SystemExit("gunicorn is not installed; use --server uvicorn or pip install gunicorn.")
+        else:
+            os.execvp(sys.executable, [
+                sys.executable, "-m", "gunicorn", APP,
+                "--worker-class", "uvicorn.workers.UvicornWorker",
+                "--workers", str(workers), "--bind", f"{host}:{port}",
+                "--chdir", os.path.dirname(os.path.abspath(__file__)),
+                "--timeout", "0",  # scrapes and streams can run for minutes
+            ])
+
+    uvicorn.run(APP, host=host, port=port, workers=workers, app_dir=os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="Worker processes (defaults to the number of CPUs).")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "uvicorn"), default="auto",
+                        help="Process manager; auto prefers gunicorn when installed.")
+    args = parser.parse_args()
+    serve(args.host, args.port, max(1, args.workers), args.server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# storage.py
+
+import os
+import asyncio
+import sqlite3
+import contextvars
+
+# Every store is shared by the server workers and crawler processes, so a
+# writer may briefly hold the lock; wait this long for it before failing.
+SQLITE_TIMEOUT = float(os.environ.get("SCRAPER_SQLITE_TIMEOUT", "30"))
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    """
+    Opens a store's SQLite database the way every store uses it: shared
+    between threads behind the store's own lock, in autocommit mode, and in
+    WAL mode so readers in other processes don't block on writers.
+    """
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=SQLITE_TIMEOUT)
+    db.execute("PRAGMA journal_mode=WAL")
+    return db
+
+
+def lru_victims(db: sqlite3.Connection, table: str, columns: str, max_bytes: int, where: str = "1", params: tuple = ()) -> list:
+    """
+    Rows (`columns`) of `table` to evict, least recently accessed first, once
+    the `size` of the rows matching `where` adds up to more than `max_bytes`.
+    The store is trimmed to 90% of the budget so a full one doesn't evict on
+    every write. The total is read from the table because other processes
+    write to the same file.
+    """
+    total = db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table} WHERE {where}", params).fetchone()[0]
+    if total <= max_bytes:
+        return []
+    victims = []
+    for *row, size in db.execute(f"SELECT {columns}, size FROM {table} WHERE {where} ORDER BY accessed_at", params).fetchall():
+        if total <= max_bytes * 0.9:
+            break
+        victims.append(tuple(row))
+        total -= size
+    return victims
+
+
+async def run_in_thread(func, *args):
+    """Runs a blocking store call in the loop's default executor, in a copy of the caller's context."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, contextvars.copy_context().run, func, *args)
@@ -3,26 +3,20 @@
 import streamlit as st
 import requests
 import pandas as pd
-from io import BytesIO
-import threading
-import uvicorn
+import json
+import os
+import time
 
-# --- Additions for Combined Deployment ---
-# Import your FastAPI app object from your api_main.py file
-from api_main import app as fastapi_app
-
-# Define the function to run the Uvicorn server
-# It must be run on 0.0.0.0 to be accessible within the container
-def run_fastapi():
-    uvicorn.run(fastapi_app, host="0.0.0.0", port=8000)
-
-# Use a daemon thread to run the API in the background
-# This thread will automatically stop when the Streamlit app stops
-daemon_thread = threading.Thread(target=run_fastapi, daemon=True)
-# Start the thread only if it's not already running
-if not daemon_thread.is_alive():
-    daemon_thread.start()
-# --- End of Additions ---
+# The API either runs as its own (multi-worker) server, set with
+# SCRAPER_API_URL, e.g. `python server.py --workers 4` on another host or
+# port, or, when that isn't set, inside this process as a fallback. Streamlit
+# re-runs this script on every interaction; start_embedded only ever starts
+# one server per process.
+BASE_URL = os.environ.get("SCRAPER_API_URL", "").rstrip("/")
+if not BASE_URL:
+    import server
+    server.start_embedded()
+    BASE_URL = f"http://localhost:{server.API_PORT}"
 
 
 st.set_page_config(page_title="Radiopaedia Scraper", layout="wide")
@@ -42,13 +36,22 @@ endpoint = st.sidebar.selectbox(
     ]
 )
 
-# The API limits pages to 5, so the frontend should reflect this.
-pages = st.sidebar.number_input("Pages to fetch", min_value=1, max_value=5, value=1, step=1)
-file_format = st.sidebar.selectbox("Output Format", ["json", "excel"])
+DOWNLOADS = {
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+file_format = st.sidebar.selectbox("Output Format", ["json", "excel", "csv", "parquet", "live"], help="'live' shows rows as soon as each one is scraped.")
+# Scrapes run as background jobs on the API, which allows up to 50 pages;
+# live streams come straight from the scrape endpoints, which allow 5.
+max_pages = 5 if file_format == "live" else 50
+pages = st.sidebar.number_input("Pages to fetch", min_value=1, max_value=max_pages, value=1, step=1)
 
 section_name = ""
 system_name = ""
 save_images = False
+study_images = False
 
 if endpoint == "Articles by Section":
     section_name = st.sidebar.selectbox(
@@ -74,79 +77,199 @@ if endpoint in ["Recent Cases", "Cases by System"]:
     # Inform user that saving images is not practical on Streamlit Cloud
     st.sidebar.warning("Image saving occurs on the server's temporary file system and cannot be accessed directly from the cloud.")
     save_images = st.sidebar.checkbox("Save images on server? (Temporary)")
+    study_images = st.sidebar.checkbox("Record study image URLs", help="Lists every study image of each case without downloading any; thumbnails are fetched when viewed.")
 
 
-# --- CRUCIAL CHANGE: Point to the locally running API ---
-BASE_URL = "http://localhost:8000"
+def build_job_request():
+    """Constructs the POST /jobs payload based on sidebar selections."""
+    if endpoint == "Recent Articles":
+        return {"scope": "articles", "filter": "recent", "pages": pages}
+    elif endpoint == "Articles by Section":
+        return {"scope": "articles", "filter": "section", "name": section_name, "pages": pages}
+    elif endpoint == "Articles by System":
+        return {"scope": "articles", "filter": "system", "name": system_name, "pages": pages}
+    elif endpoint == "Recent Cases":
+        return {"scope": "cases", "filter": "recent", "pages": pages, "save_images": save_images, "study_images": study_images}
+    elif endpoint == "Cases by System":
+        return {"scope": "cases", "filter": "system", "name": system_name, "pages": pages, "save_images": save_images, "study_images": study_images}
+    return None
+
+def run_job(job_request):
+    """Submits a scrape job and polls it, updating a progress bar, until it finishes."""
+    job = requests.post(f"{BASE_URL}/jobs", json=job_request, timeout=30)
+    job.raise_for_status()
+    job = job.json()
+    progress = st.progress(0.0, text="Scraping data from Radiopaedia...")
+    while job["status"] in ("queued", "running"):
+        time.sleep(1)
+        job = requests.get(f"{BASE_URL}/jobs/{job['job_id']}", timeout=30).json()
+        progress.progress(job["pages_done"] / job["pages_total"], text=f"Scraped {job['pages_done']} of {job['pages_total']} page(s)...")
+    progress.empty()
+    return job
 
-def build_api_url():
-    """Constructs the full API URL based on sidebar selections."""
-    # Sanitize URL parts
+def build_stream_url():
+    """Constructs the NDJSON streaming URL of the scrape endpoint matching the sidebar selections."""
     safe_section = requests.utils.quote(section_name)
     safe_system = requests.utils.quote(system_name)
-    
+
     if endpoint == "Recent Articles":
-        return f"{BASE_URL}/articles/recent?pages={pages}&file_format={file_format}"
+        return f"{BASE_URL}/articles/recent?pages={pages}&file_format=ndjson"
     elif endpoint == "Articles by Section":
-        return f"{BASE_URL}/articles/by-section/{safe_section}?pages={pages}&file_format={file_format}"
+        return f"{BASE_URL}/articles/by-section/{safe_section}?pages={pages}&file_format=ndjson"
     elif endpoint == "Articles by System":
-        return f"{BASE_URL}/articles/by-system/{safe_system}?pages={pages}&file_format={file_format}"
+        return f"{BASE_URL}/articles/by-system/{safe_system}?pages={pages}&file_format=ndjson"
     elif endpoint == "Recent Cases":
-        return f"{BASE_URL}/cases/recent?pages={pages}&file_format={file_format}&save_images={str(save_images).lower()}"
+        return f"{BASE_URL}/cases/recent?pages={pages}&file_format=ndjson&save_images={str(save_images).lower()}&study_images={str(study_images).lower()}"
     elif endpoint == "Cases by System":
-        return f"{BASE_URL}/cases/by-system/{safe_system}?pages={pages}&file_format={file_format}&save_images={str(save_images).lower()}"
+        return f"{BASE_URL}/cases/by-system/{safe_system}?pages={pages}&file_format=ndjson&save_images={str(save_images).lower()}&study_images={str(study_images).lower()}"
     return None
 
-if st.sidebar.button("Fetch Data"):
-    api_url = build_api_url()
-    st.info(f"Requesting data from local API endpoint...")
-    st.write(f"`GET {api_url}`")
+def stream_rows(api_url):
+    """Renders records page by page as the API streams them in."""
+    rows, tables = {}, {}
+    with requests.get(api_url, stream=True, timeout=(10, 300)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            item = json.loads(line)
+            if "error" in item:
+                st.error(item["error"])
+                break
+            page_key = f"page_{item['page']}"
+            if page_key not in tables:
+                st.subheader(page_key.replace("_", " ").title())
+                tables[page_key] = st.empty()
+                rows[page_key] = []
+            rows[page_key].append(item["record"])
+            tables[page_key].dataframe(pd.DataFrame(rows[page_key]))
+        if "X-Image-Save-Path" in response.headers:
+            st.success(f"Images are being saved on the server at: {response.headers['X-Image-Save-Path']}")
+    return sum(len(page_rows) for page_rows in rows.values())
 
-    try:
-        # Show a spinner while the scraping happens
-        with st.spinner('Scraping data from Radiopaedia... This may take a moment.'):
-            # Increase the timeout because scraping can be slow
-            response = requests.get(api_url, timeout=300)
-
-        if response.status_code != 200:
-            st.error(f"API Error: Status code {response.status_code}")
-            st.json(response.json())
+# Results are cached by query: the API keeps each scrape under a result ID
+# and renders it in any format, so viewing or exporting again never re-scrapes.
+RESULT_CACHE_TTL = 3600
+
+@st.cache_resource
+def result_urls() -> dict:
+    """URL of the stored result for each query already scraped, shared by every session."""
+    return {}
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, show_spinner=False)
+def load_rows(result_url):
+    """The result as JSON, or None once the API has evicted it."""
+    response = requests.get(result_url, timeout=60)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, show_spinner=False)
+def load_export(result_url, file_format):
+    response = requests.get(result_url, params={"file_format": file_format}, timeout=120)
+    response.raise_for_status()
+    return response.content
+
+# Study images are listed and thumbnailed by the API only when a case is picked here.
+THUMBNAIL_SIZE = 256
+GRID_COLUMNS = 4
+
+@st.cache_data(ttl=RESULT_CACHE_TTL, show_spinner=False)
+def load_image(image_url):
+    response = requests.get(image_url, timeout=120)
+    response.raise_for_status()
+    return response.content
+
+def show_study_images(rows):
+    """Thumbnail grid of the study images of one case picked from the result."""
+    cases = {f"{row.get('title') or row['url']} ({row['patient_id'][:8]})": row["patient_id"] for row in rows if row.get("patient_id")}
+    if not cases:
+        return
+    st.subheader("Study Images")
+    choice = st.selectbox("Case", ["Choose a case..."] + list(cases))
+    if choice not in cases:
+        return
+    listing = requests.get(f"{BASE_URL}/cases/{cases[choice]}/images", params={"size": THUMBNAIL_SIZE}, timeout=60)
+    if listing.status_code != 200:
+        st.warning(listing.json().get("detail", "Study images are unavailable for this case."))
+        return
+    images = listing.json()["images"]
+    if not images:
+        st.write("This case has no study images.")
+        return
+    columns = st.columns(GRID_COLUMNS)
+    for image in images:
+        with columns[image["index"] % GRID_COLUMNS]:
+            try:
+                st.image(load_image(BASE_URL + image["thumbnail_url"]), caption=f"Image {image['index'] + 1}")
+            except requests.exceptions.RequestException as e:
+                st.error(f"Image {image['index'] + 1} could not be loaded: {e}")
+
+def show_result(result_url):
+    """Shows the result's rows straight from its JSON, plus a download of the chosen file format."""
+    data = load_rows(result_url)
+    if data is None:
+        st.warning("This result has expired on the server; fetch it again.")
+        return
+    st.success("Data fetched successfully!")
+    if file_format in DOWNLOADS:
+        extension, mime = DOWNLOADS[file_format]
+        st.download_button(
+           label=f"Download {file_format.title()} file",
+           data=load_export(result_url, file_format),
+           file_name=f"radiopaedia_data.{extension}",
+           mime=mime
+        )
+    for page_key, page_data in data.get("data", {}).items():
+        st.subheader(page_key.replace("_", " ").title())
+        if not page_data:
+            st.write("No data found for this page.")
         else:
-            st.success("Data fetched successfully!")
-            if file_format == "json":
-                data = response.json()
-                for page_key, page_data in data.get("data", {}).items():
-                    st.subheader(page_key.replace("_", " ").title())
-                    if not page_data:
-                        st.write("No data found for this page.")
-                    else:
-                        df = pd.DataFrame(page_data)
-                        st.dataframe(df)
-                if "image_save_info" in data and data["image_save_info"]["saved"]:
-                    st.success(f"Images were saved on the server at: {data['image_save_info']['directory']}")
-            
-            else: # Excel format
-                st.subheader("Excel File Content")
-                # Provide a download button for the Excel file
-                st.download_button(
-                   label="Download Excel file",
-                   data=response.content,
-                   file_name="radiopaedia_data.xlsx",
-                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-                
-                # Optionally display the content of the Excel file
-                with BytesIO(response.content) as b:
-                    xls = pd.ExcelFile(b)
-                    for sheet in xls.sheet_names:
-                        df = pd.read_excel(xls, sheet_name=sheet)
-                        st.write(f"Sheet: {sheet}")
-                        st.dataframe(df)
-
-                if "X-Image-Save-Path" in response.headers:
-                    st.success(f"Images were saved on the server at: {response.headers['X-Image-Save-Path']}")
+            st.dataframe(pd.DataFrame(page_data))
+    if "image_save_info" in data and data["image_save_info"]["saved"]:
+        st.success(f"Images were saved on the server at: {data['image_save_info']['directory']}")
+    show_study_images([row for page_data in data.get("data", {}).values() for row in page_data])
+
+refresh = st.sidebar.checkbox("Scrape again", help="Ignore results already fetched for this query.") if file_format != "live" else False
+fetch_clicked = st.sidebar.button("Fetch Data")
 
+if fetch_clicked and file_format == "live":
+    api_url = build_stream_url()
+    st.info("Streaming data from the API...")
+    st.write(f"`GET {api_url}`")
+    try:
+        record_count = stream_rows(api_url)
+        st.success(f"Streamed {record_count} record(s).")
     except requests.exceptions.RequestException as e:
         st.error(f"A network request exception occurred: {e}")
-    except Exception as e:
-        st.error(f"An unexpected error occurred: {e}")
+
+elif file_format != "live":
+    query_key = json.dumps(build_job_request(), sort_keys=True)
+    if fetch_clicked:
+        try:
+            result_url = None if refresh else result_urls().get(query_key)
+            if result_url is None or load_rows(result_url) is None:
+                job_request = build_job_request()
+                st.info("Submitting scrape job to the API...")
+                st.write(f"`POST {BASE_URL}/jobs` `{job_request}`")
+                job = run_job(job_request)
+                if job["status"] == "failed":
+                    st.error(f"An error occurred: {job['error']}")
+                elif job.get("result_id"):
+                    result_urls()[query_key] = f"{BASE_URL}/results/{job['result_id']}"
+                else:  # the API runs without a result store
+                    result_urls()[query_key] = f"{BASE_URL}/jobs/{job['job_id']}/result"
+        except requests.exceptions.RequestException as e:
+            st.error(f"A network request exception occurred: {e}")
+        st.session_state["result"] = (query_key, result_urls().get(query_key))
+
+    # Reruns (switching format, clicking download) keep showing the fetched result.
+    query_result = st.session_state.get("result")
+    if query_result and query_result[0] == query_key and query_result[1]:
+        try:
+            show_result(query_result[1])
+        except requests.exceptions.RequestException as e:
+            st.error(f"A network request exception occurred: {e}")
+        except Exception as e:
+            st.error(f"An unexpected error occurred: {e}")
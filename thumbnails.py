@@ -0,0 +1,139 @@
+# thumbnails.py
+
+import io
+import os
+import time
+import uuid
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from storage import open_database, lru_victims
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it only original images are served
+    Image = None
+
+THUMBNAIL_DIR = os.environ.get("SCRAPER_THUMBNAIL_DIR", "thumbnails")
+THUMBNAIL_MAX_BYTES = int(float(os.environ.get("SCRAPER_THUMBNAIL_MAX_MB", "256")) * 1024 * 1024)
+# Every API worker process gets its own pool, and the server runs a worker per
+# CPU, so each pool stays small.
+THUMBNAIL_WORKERS = int(os.environ.get("SCRAPER_THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_SIZE = int(os.environ.get("SCRAPER_THUMBNAIL_SIZE", "256"))
+THUMBNAIL_MAX_SIZE = 1024
+THUMBNAIL_QUALITY = 85
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    """
+    Scales an image down to fit in `size` x `size` pixels and returns it as a
+    JPEG. JPEGs are decoded at a reduced scale straight away (draft mode), so
+    large studies never get decoded at full resolution. Runs in the thumbnail
+    process pool.
+    """
+    if Image is None:
+        raise RuntimeError("Thumbnails need Pillow installed on the server.")
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def cache_key(url: str, size: int) -> str:
+    """Key of an image URL at a thumbnail size; size 0 is the original image."""
+    return f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}_{size}"
+
+
+class ThumbnailCache:
+    """
+    Original images and their thumbnails, fetched and generated on first
+    access and kept on disk with an SQLite catalogue. Once the files take up
+    more than `max_bytes`, the least recently used ones are evicted.
+    """
+
+    def __init__(self, directory: str = THUMBNAIL_DIR, max_bytes: int = THUMBNAIL_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "tmp"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = open_database(os.path.join(directory, "thumbnails.sqlite"))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " key TEXT PRIMARY KEY, file TEXT, media_type TEXT, size INTEGER, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS images_accessed_at ON images (accessed_at)")
+
+    def get(self, key: str):
+        """Returns `(path, media_type)` of a cached image, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT file, media_type FROM images WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE images SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        path = os.path.join(self.directory, row[0])
+        return (path, row[1]) if os.path.exists(path) else None
+
+    def read(self, key: str):
+        """Returns `(data, media_type)` of a cached image, or None; one evicted after the lookup counts as a miss."""
+        if (cached := self.get(key)) is None:
+            return None
+        path, media_type = cached
+        try:
+            with open(path, "rb") as f:
+                return f.read(), media_type
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes, media_type: str) -> str:
+        file = os.path.join(key[:2], key)
+        path = os.path.join(self.directory, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(self.directory, "tmp", uuid.uuid4().hex)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?)", (key, file, media_type, len(data), time.time()))
+            self._evict()
+        return path
+
+    def _evict(self):
+        for key, file in lru_victims(self._db, "images", "key, file", self.max_bytes):
+            self._db.execute("DELETE FROM images WHERE key = ?", (key,))
+            try:
+                os.remove(os.path.join(self.directory, file))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images").fetchone()
+        return {"images": entries, "size_bytes": size, "max_bytes": self.max_bytes, "thumbnails": Image is not None}
+
+
+_default_cache = None
+_default_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    """Process-wide thumbnail cache; None when SCRAPER_THUMBNAIL_DIR is empty."""
+    global _default_cache
+    if _default_cache is None and THUMBNAIL_DIR:
+        _default_cache = ThumbnailCache()
+    return _default_cache
+
+
+def get_thumbnail_pool() -> ProcessPoolExecutor:
+    """Process pool for `make_thumbnail`, started on first use."""
+    global _default_pool
+    with _pool_lock:
+        if _default_pool is None:
+            context = multiprocessing.get_context("spawn")  # forking a threaded server process is unsafe
+            _default_pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS, mp_context=context)
+    return _default_pool